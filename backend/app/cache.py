@@ -0,0 +1,85 @@
+"""Shared Redis client and response cache. Redis is optional: without REDIS_URL callers fall back to in-process state."""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+import orjson
+from cachetools import TLRUCache
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+try:
+    from app.config import settings
+except ImportError:
+    from config import settings
+
+_redis_client = None
+
+# Per-process generation counters used without Redis (see cache_generation)
+_local_generations: Dict[str, int] = {}
+
+# Per-process fallback cache; entries are (ttl_seconds, value) so each key keeps its own expiry
+_local_cache: TLRUCache = TLRUCache(
+    maxsize=settings.response_cache_size,
+    ttu=lambda _key, entry, now: now + entry[0],
+)
+
+
+def get_redis():
+    """Return the shared async Redis client, or None when Redis is not configured"""
+    global _redis_client
+    if _redis_client is None and settings.redis_url and aioredis is not None:
+        _redis_client = aioredis.from_url(settings.redis_url, decode_responses=True)
+    return _redis_client
+
+
+async def close_redis():
+    """Close the shared Redis client on shutdown"""
+    global _redis_client
+    if _redis_client is not None:
+        await _redis_client.aclose()
+        _redis_client = None
+
+
+def make_cache_key(namespace: str, params: Any) -> str:
+    """Build a stable cache key from a namespace and JSON-serializable parameters"""
+    encoded = orjson.dumps(params, default=str, option=orjson.OPT_SORT_KEYS)
+    return f"{namespace}:{hashlib.blake2b(encoded, digest_size=16).hexdigest()}"
+
+
+async def cache_get(key: str) -> Optional[str]:
+    """Fetch a cached string value, or None on a miss"""
+    redis = get_redis()
+    if redis is not None:
+        return await redis.get(key)
+    entry = _local_cache.get(key)
+    return entry[1] if entry is not None else None
+
+
+async def cache_set(key: str, value: str, ttl_seconds: int):
+    """Store a string value with a TTL"""
+    redis = get_redis()
+    if redis is not None:
+        await redis.set(key, value, ex=ttl_seconds)
+    else:
+        _local_cache[key] = (ttl_seconds, value)
+
+
+async def cache_generation(namespace: str) -> int:
+    """Current generation of a namespace; include it in keys so a bump invalidates them all"""
+    redis = get_redis()
+    if redis is not None:
+        return int(await redis.get(f"gen:{namespace}") or 0)
+    return _local_generations.get(namespace, 0)
+
+
+async def invalidate_namespace(namespace: str):
+    """Invalidate every cached entry keyed under the namespace's current generation"""
+    redis = get_redis()
+    if redis is not None:
+        await redis.incr(f"gen:{namespace}")
+    else:
+        _local_generations[namespace] = _local_generations.get(namespace, 0) + 1
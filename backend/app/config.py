@@ -1,6 +1,7 @@
 import os
+from functools import lru_cache
 from pathlib import Path
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -14,23 +15,33 @@ DEFAULT_SQLITE_PATH = (
 DEFAULT_SQLITE_URL = f"sqlite:///{DEFAULT_SQLITE_PATH}"
 
 
-def _env(primary: str, default: str = "", *aliases: str) -> str:
-    """Read env var by primary key, then fall back to aliases."""
-    keys = (primary, *aliases)
-    for key in keys:
-        value = os.getenv(key)
-        if value is not None:
-            return value
-    return default
-
-
 class Settings(BaseSettings):
-    """Application settings"""
+    """Application settings
+
+    Values come from the environment (and .env) when the instance is built;
+    field names match env vars case-insensitively, e.g. USE_POSTGRES.
+    """
+    
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
     
     # Database Configuration
-    use_postgres: bool = _env("use_postgres", "false", "USE_POSTGRES").lower() == "true"
-    database_url: str = _env("database_url", DEFAULT_SQLITE_URL, "DATABASE_URL")
-    sqlalchemy_database_url: str = _env("sqlalchemy_database_url", DEFAULT_SQLITE_URL, "SQLALCHEMY_DATABASE_URL")
+    use_postgres: bool = False
+    database_url: str = DEFAULT_SQLITE_URL
+    sqlalchemy_database_url: str = DEFAULT_SQLITE_URL
+    db_pool_size: int = 20
+    db_max_overflow: int = 40
+    db_pool_recycle: int = 3600
+    db_pool_prewarm: int = 5  # connections opened per pool at startup
+    db_raise_on_lazy_load: bool = False  # enable in dev/test to catch N+1 lazy loads
+    
+    # Redis Configuration (optional; leave empty to keep state in-process)
+    redis_url: str = ""
+    conversation_ttl_seconds: int = 3600
+    conversation_cache_size: int = 10000
+    response_cache_size: int = 2048
+    disaster_list_cache_ttl_seconds: int = 15
+    disaster_stats_cache_ttl_seconds: int = 60
+    sos_analytics_cache_ttl_seconds: int = 10
     
     # API Configuration
     api_title: str = "Disaster Response and Coordination System"
@@ -45,48 +56,36 @@ class Settings(BaseSettings):
     server_port: int = 8000
     
     # OpenAI Configuration
-    openai_api_key: str = _env("openai_api_key", "", "OPENAI_API_KEY")
+    openai_api_key: str = ""
     openai_model: str = "gpt-4"
     openai_temperature: float = 0.7
     openai_max_tokens: int = 2000
+    openai_max_connections: int = 100
+    openai_max_keepalive_connections: int = 20
+    ai_response_cache_ttl_seconds: int = 86400
+    ai_http_cache_max_age_seconds: int = 600
     
     # External API Keys
-    openweather_api_key: str = _env("openweather_api_key", "", "OPENWEATHER_API_KEY")
-    nasa_firms_api_key: str = _env("nasa_firms_api_key", "", "NASA_FIRMS_API_KEY")
-    nasa_api_key: str = _env("nasa_api_key", "", "NASA_API_KEY")
-    data_gov_in_api_key: str = _env("data_gov_in_api_key", "", "DATA_GOV_IN_API_KEY")
-    data_gov_in_resource_id: str = _env("data_gov_in_resource_id", "", "DATA_GOV_IN_RESOURCE_ID")
-    noaa_api_token: str = _env("noaa_api_token", "", "NOAA_API_TOKEN")
-    noaa_dataset_id: str = _env("noaa_dataset_id", "", "NOAA_DATASET_ID")
-    noaa_location_id: str = _env("noaa_location_id", "", "NOAA_LOCATION_ID")
-    imd_api_key: str = _env("imd_api_key", "", "IMD_API_KEY")
-    ndma_api_key: str = _env("ndma_api_key", "", "NDMA_API_KEY")
-    sms_provider: str = _env("sms_provider", "mock", "SMS_PROVIDER")
-    twilio_account_sid: str = _env("twilio_account_sid", "", "TWILIO_ACCOUNT_SID")
-    twilio_auth_token: str = _env("twilio_auth_token", "", "TWILIO_AUTH_TOKEN")
-    twilio_from_number: str = _env("twilio_from_number", "", "TWILIO_FROM_NUMBER")
-    weather_gov_user_agent: str = _env("weather_gov_user_agent", "drs-resilience-hub/1.0", "WEATHER_GOV_USER_AGENT")
-    usgs_geojson_feed_url: str = _env(
-        "usgs_geojson_feed_url",
-        "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_day.geojson",
-        "USGS_GEOJSON_FEED_URL",
-    )
-    openfema_disaster_feed_url: str = _env(
-        "openfema_disaster_feed_url",
-        "https://www.fema.gov/api/open/v2/DisasterDeclarationsSummaries?$top=50",
-        "OPENFEMA_DISASTER_FEED_URL",
-    )
-    sachet_ndma_feed_url: str = _env(
-        "sachet_ndma_feed_url",
-        "https://sachet.ndma.gov.in/",
-        "SACHET_NDMA_FEED_URL",
-    )
-    nasa_eonet_feed_url: str = _env(
-        "nasa_eonet_feed_url",
-        "https://eonet.gsfc.nasa.gov/api/v3/events?status=open&limit=50",
-        "NASA_EONET_FEED_URL",
-    )
-    google_client_id: str = _env("google_client_id", "", "GOOGLE_CLIENT_ID")
+    openweather_api_key: str = ""
+    nasa_firms_api_key: str = ""
+    nasa_api_key: str = ""
+    data_gov_in_api_key: str = ""
+    data_gov_in_resource_id: str = ""
+    noaa_api_token: str = ""
+    noaa_dataset_id: str = ""
+    noaa_location_id: str = ""
+    imd_api_key: str = ""
+    ndma_api_key: str = ""
+    sms_provider: str = "mock"
+    twilio_account_sid: str = ""
+    twilio_auth_token: str = ""
+    twilio_from_number: str = ""
+    weather_gov_user_agent: str = "drs-resilience-hub/1.0"
+    usgs_geojson_feed_url: str = "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_day.geojson"
+    openfema_disaster_feed_url: str = "https://www.fema.gov/api/open/v2/DisasterDeclarationsSummaries?$top=50"
+    sachet_ndma_feed_url: str = "https://sachet.ndma.gov.in/"
+    nasa_eonet_feed_url: str = "https://eonet.gsfc.nasa.gov/api/v3/events?status=open&limit=50"
+    google_client_id: str = ""
     
     # AI Configuration
     ai_system_prompt: str = """You are an AI Emergency Response Assistant for disaster management. 
@@ -97,11 +96,13 @@ class Settings(BaseSettings):
     4. Providing tactical guidance to responders
     
     Always prioritize safety and clarity. Be concise but comprehensive."""
-    
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsing the environment only once"""
+    return Settings()
+
+
+settings = get_settings()
 
@@ -1,37 +1,300 @@
-from sqlalchemy import create_engine
+import asyncio
+import math
+
+import orjson
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, raiseload, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 
 try:
     from app.config import settings
 except ImportError:
     from config import settings
 
-# Create database engine with SQLite connect_args for check_same_thread
+
+def _json_serializer(value) -> str:
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# JSON/JSONB columns are encoded and decoded with orjson rather than stdlib json
+JSON_CODEC = {
+    "json_serializer": _json_serializer,
+    "json_deserializer": orjson.loads,
+}
+
+# In-memory SQLite databases only exist on a single connection
+IN_MEMORY_SQLITE = settings.sqlalchemy_database_url in ("sqlite://", "sqlite:///:memory:")
+
+# Create database engine with an explicit, env-tunable connection pool
 if "sqlite" in settings.sqlalchemy_database_url:
+    if IN_MEMORY_SQLITE:
+        # In-memory databases only exist on a single connection, so share it
+        engine = create_engine(
+            settings.sqlalchemy_database_url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+            **JSON_CODEC,
+        )
+    else:
+        engine = create_engine(
+            settings.sqlalchemy_database_url,
+            connect_args={"check_same_thread": False},
+            poolclass=QueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            **JSON_CODEC,
+        )
+else:
+    # psycopg2 also batches executemany UPDATE/DELETE; INSERTs use insertmanyvalues
+    driver_options = (
+        {"executemany_mode": "values_plus_batch"}
+        if make_url(settings.sqlalchemy_database_url).get_driver_name() == "psycopg2"
+        else {}
+    )
     engine = create_engine(
         settings.sqlalchemy_database_url,
-        connect_args={"check_same_thread": False}
+        poolclass=QueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True,
+        **driver_options,
+        **JSON_CODEC,
     )
-else:
-    engine = create_engine(settings.sqlalchemy_database_url)
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+def _null_safe(fn):
+    """Wrap a math function so NULL or out-of-domain arguments yield NULL, as in SQLite"""
+
+    def wrapper(*args):
+        if any(arg is None for arg in args):
+            return None
+        try:
+            return fn(*args)
+        except (ValueError, OverflowError):
+            return None
+
+    return wrapper
+
+
+# Distance queries use SQLite's math functions, which are only compiled in
+# with SQLITE_ENABLE_MATH_FUNCTIONS; older or minimal builds get these instead
+SQLITE_MATH_FALLBACKS = {
+    "radians": (1, _null_safe(math.radians)),
+    "sin": (1, _null_safe(math.sin)),
+    "cos": (1, _null_safe(math.cos)),
+    "asin": (1, _null_safe(math.asin)),
+    "sqrt": (1, _null_safe(math.sqrt)),
+    "power": (2, _null_safe(math.pow)),
+}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune every new SQLite connection for concurrent reads and cheaper writes"""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    for name, (n_args, fn) in SQLITE_MATH_FALLBACKS.items():
+        try:
+            cursor.execute(f"SELECT {name}({', '.join(['1'] * n_args)})")
+        except Exception:
+            dbapi_connection.create_function(name, n_args, fn, deterministic=True)
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _raise_on_lazy_load(orm_execute_state):
+    """Make any lazy relationship load raise, so N+1 access fails loudly"""
+    if orm_execute_state.is_select and not orm_execute_state.is_relationship_load:
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*"))
+
+
+# Development/test guard: relationships must be loaded explicitly
+# (selectinload/joinedload), so response serialization can't issue N+1 queries.
+# Registered on Session itself so AsyncSession's inner sessions are covered too.
+if settings.db_raise_on_lazy_load:
+    event.listen(Session, "do_orm_execute", _raise_on_lazy_load)
+
+# Read-only endpoints on Postgres skip the BEGIN/COMMIT round trip per SELECT;
+# the option engine shares the main engine's pool.
+if engine.dialect.name == "postgresql":
+    ReadSessionLocal = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=engine.execution_options(isolation_level="AUTOCOMMIT"),
+    )
+else:
+    ReadSessionLocal = SessionLocal
+
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Swap the sync DBAPI driver in a database URL for its asyncio counterpart"""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    driver = ASYNC_DRIVERS.get(dialect)
+    if not sep or not driver:
+        return url
+    return f"{dialect}+{driver}://{rest}"
+
+
+# Async engine for `async def` endpoints so DB waits don't block the event loop
+if IN_MEMORY_SQLITE:
+    # Shares the single-connection setup, but aiosqlite still opens its own
+    # in-memory database, so init_db creates tables on the sync engine too
+    async_engine = create_async_engine(
+        get_async_database_url(settings.sqlalchemy_database_url),
+        poolclass=StaticPool,
+        **JSON_CODEC,
+    )
+elif "sqlite" in settings.sqlalchemy_database_url:
+    async_engine = create_async_engine(
+        get_async_database_url(settings.sqlalchemy_database_url),
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        **JSON_CODEC,
+    )
+else:
+    async_engine = create_async_engine(
+        get_async_database_url(settings.sqlalchemy_database_url),
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True,
+        **JSON_CODEC,
+    )
+
+if async_engine.dialect.name == "sqlite":
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 # Create base class for models
 Base = declarative_base()
 
 
 def get_db():
-    """Dependency for FastAPI to get database session"""
-    db = SessionLocal()
-    try:
+    """Dependency for FastAPI to get database session
+
+    Commits when the endpoint returns and rolls back if it raises, so the
+    connection always goes back to the pool in a clean state.
+    """
+    with SessionLocal() as db:
+        try:
+            yield db
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+
+def get_read_db():
+    """Dependency for read-only endpoints; never commits"""
+    with ReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def init_db():
-    """Initialize database tables"""
-    Base.metadata.create_all(bind=engine)
+async def get_async_db():
+    """Dependency for async FastAPI endpoints to get an AsyncSession"""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+def _create_missing_tables(connection):
+    """Create only the tables that don't exist yet, using one table listing query"""
+    existing = set(inspect(connection).get_table_names())
+    missing = [table for table in Base.metadata.sorted_tables if table.name not in existing]
+    if missing:
+        Base.metadata.create_all(bind=connection, tables=missing)
+
+
+# create_all never alters existing tables, so columns and indexes added to
+# tables that predate them are brought in with idempotent DDL here
+POSTGIS_SCHEMA_UPGRADES = (
+    "ALTER TABLE sos_reports ADD COLUMN IF NOT EXISTS geog geography(Point,4326) "
+    "GENERATED ALWAYS AS (geography(ST_SetSRID(ST_MakePoint(longitude, latitude), 4326))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_sos_reports_geog ON sos_reports USING gist (geog)",
+    # Nearby and dispatch searches filter on resources.geom; rows written
+    # before it was maintained would otherwise never match
+    "UPDATE resources SET geom = ST_SetSRID(ST_MakePoint(longitude, latitude), 4326) "
+    "WHERE geom IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL",
+)
+
+
+def _upgrade_existing_tables(connection):
+    """Apply the schema upgrades that create_all can't to a PostGIS database"""
+    if connection.dialect.name != "postgresql":
+        return
+    for statement in POSTGIS_SCHEMA_UPGRADES:
+        connection.execute(text(statement))
+
+
+def _init_db_schema(connection):
+    """Create missing tables, then upgrade the ones that already existed"""
+    _create_missing_tables(connection)
+    _upgrade_existing_tables(connection)
+
+
+def _init_sync_db():
+    """Create and upgrade tables through the sync engine in one transaction"""
+    with engine.begin() as conn:
+        _init_db_schema(conn)
+
+
+async def init_db():
+    """Initialize database tables in a single DDL transaction"""
+    if IN_MEMORY_SQLITE:
+        # The async engine's in-memory database is a separate one; create the
+        # tables where the sync SessionLocal will look for them as well
+        await asyncio.to_thread(_init_sync_db)
+    async with async_engine.begin() as conn:
+        await conn.run_sync(_init_db_schema)
+
+
+def _warm_sync_pool(size: int):
+    """Open `size` connections at once, then return them to the sync pool to seed it"""
+    connections = [engine.connect() for _ in range(size)]
+    for connection in connections:
+        connection.close()
+
+
+async def warm_pools():
+    """
+    Pre-open pooled connections at startup so the first burst of requests
+    doesn't pay connect/auth latency. Connections are held simultaneously;
+    connecting and closing one at a time would just reuse a single slot.
+    """
+    size = min(settings.db_pool_prewarm, settings.db_pool_size)
+    if size <= 0 or isinstance(engine.pool, StaticPool):
+        return
+    
+    connections = await asyncio.gather(*(async_engine.connect() for _ in range(size)))
+    await asyncio.gather(*(connection.close() for connection in connections))
+    await asyncio.to_thread(_warm_sync_pool, size)
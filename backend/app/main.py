@@ -1,5 +1,8 @@
 import os
-from fastapi import FastAPI, WebSocket
+from functools import lru_cache
+import orjson
+from fastapi import FastAPI, Request, Response, WebSocket
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
@@ -8,12 +11,16 @@ from app.routers import auth
 
 try:
     from app.config import settings
-    from app.database import init_db
+    from app.database import init_db, warm_pools
+    from app.cache import close_redis
+    from app.responses import ORJSONResponse
     from app.routers import resources, dispatch, ai, sos, disaster, infrastructure, simulation, logging, operations, public, gov_feeds, sms_alerts
     from app.websockets.manager import handle_websocket
 except ImportError:
     from config import settings
-    from database import init_db
+    from database import init_db, warm_pools
+    from cache import close_redis
+    from responses import ORJSONResponse
     from routers import resources, dispatch, ai, sos, disaster
     from websockets.manager import handle_websocket
 
@@ -22,10 +29,15 @@ except ImportError:
 async def lifespan(app: FastAPI):
     # Startup
     print("Initializing database...")
-    init_db()
+    await init_db()
+    await warm_pools()
+    sos_alert_relay = sos.start_sos_alert_relay()
     print("Application started successfully")
     yield
     # Shutdown
+    if sos_alert_relay is not None:
+        sos_alert_relay.cancel()
+    await close_redis()
     print("Application shutdown")
 
 
@@ -34,9 +46,35 @@ app = FastAPI(
     title=settings.api_title,
     description=settings.api_description,
     version=settings.api_version,
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Wrapped in Default() so routes with a response_model keep FastAPI's
+    # Pydantic dump_json fast path; orjson handles the plain-dict routes.
+    default_response_class=Default(ORJSONResponse),
 )
 
+
+
+@lru_cache(maxsize=1)
+def openapi_json() -> bytes:
+    """
+    The OpenAPI document, serialized once. Built on the first request rather
+    than at startup so the deferred schema builds stay off the boot path.
+    """
+    return orjson.dumps(app.openapi())
+
+
+async def openapi_endpoint(request: Request) -> Response:
+    """OpenAPI schema endpoint"""
+    return Response(openapi_json(), media_type="application/json")
+
+
+# Serve the cached bytes in place of FastAPI's route, which re-serializes
+# the whole document on every /docs load
+app.router.routes = [
+    route for route in app.router.routes if getattr(route, "path", None) != app.openapi_url
+]
+app.add_route(app.openapi_url, openapi_endpoint, include_in_schema=False)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
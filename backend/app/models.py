@@ -1,5 +1,7 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, JSON
+from sqlalchemy import Column, Computed, Integer, String, Float, DateTime, Enum, JSON, Index, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 import enum
 
 try:
@@ -13,14 +15,40 @@ except ImportError:
 USE_GEOMETRY = "sqlite" not in settings.sqlalchemy_database_url
 
 if "postgresql" in settings.sqlalchemy_database_url:
-    from geoalchemy2 import Geometry
+    from geoalchemy2 import Geography, Geometry
     HAS_GEOMETRY = True
 else:
     HAS_GEOMETRY = False
-    Geometry = None
+    Geography = Geometry = None
 
-# Use JSON for SQLite, JSONB for PostgreSQL
-JSONColumnType = JSON if "sqlite" in settings.sqlalchemy_database_url else JSON
+class utcnow(FunctionElement):
+    """Current UTC timestamp, evaluated by the database inside the INSERT/UPDATE"""
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow, "postgresql")
+def _pg_utcnow(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+@compiles(utcnow, "sqlite")
+def _sqlite_utcnow(element, compiler, **kw):
+    # CURRENT_TIMESTAMP is UTC but only to the second; keep milliseconds
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+@compiles(utcnow)
+def _default_utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+# Use JSON for SQLite, JSONB for PostgreSQL (binary storage, GIN-indexable)
+if "postgresql" in settings.sqlalchemy_database_url:
+    from sqlalchemy.dialects.postgresql import JSONB
+    JSONColumnType = JSONB
+else:
+    JSONColumnType = JSON
 
 
 class ResourceType(str, enum.Enum):
@@ -41,6 +69,17 @@ class Resource(Base):
     """Resource model for ambulances, drones, rescue teams"""
     
     __tablename__ = "resources"
+    __table_args__ = (
+        # Dispatch/nearby queries filter on status and type together
+        Index("ix_resources_status_type", "status", "type"),
+        Index("ix_resources_lat_lon", "latitude", "longitude"),
+        # get_nearby_resources runs ST_DWithin on geography(geom)
+        *(
+            (Index("ix_resources_geom_geography", text("geography(geom)"), postgresql_using="gist"),)
+            if HAS_GEOMETRY
+            else ()
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -53,8 +92,8 @@ class Resource(Base):
     # Geometry column only for PostgreSQL  
     geom = Column(Geometry("POINT", srid=4326), index=True) if HAS_GEOMETRY else None
     resource_metadata = Column(JSONColumnType, nullable=True)  # Store custom metadata like capacity, specialization
-    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    last_updated = Column(DateTime, default=utcnow(), onupdate=utcnow())
+    created_at = Column(DateTime, default=utcnow())
     
     class Config:
         from_attributes = True
@@ -75,7 +114,7 @@ class DispatchRecord(Base):
     dispatch_time = Column(DateTime, default=datetime.utcnow)
     estimated_arrival = Column(DateTime)
     actual_arrival = Column(DateTime, nullable=True)
-    status = Column(String, default="dispatched")  # dispatched, arrived, completed, cancelled
+    status = Column(String, default="dispatched", index=True)  # dispatched, arrived, completed, cancelled
     created_at = Column(DateTime, default=datetime.utcnow)
     
     class Config:
@@ -112,6 +151,12 @@ class Disaster(Base):
     """Disaster event tracking"""
     
     __tablename__ = "disasters"
+    __table_args__ = (
+        Index("ix_disasters_status_reported_at", "status", "reported_at"),
+        # list_disasters filters on status and/or validation state
+        Index("ix_disasters_status_validated", "status", "is_validated"),
+        Index("ix_disasters_lat_lon", "latitude", "longitude"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     type = Column(Enum(DisasterType), index=True)
@@ -129,10 +174,10 @@ class Disaster(Base):
     description = Column(String)
     source = Column(String)  # Source of report (USGS, citizen, official, etc)
     extra_metadata = Column(JSONColumnType, nullable=True)
-    reported_at = Column(DateTime, default=datetime.utcnow, index=True)
+    reported_at = Column(DateTime, default=utcnow(), index=True)
     validated_at = Column(DateTime, nullable=True)
     resolved_at = Column(DateTime, nullable=True)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=utcnow(), onupdate=utcnow())
     
     class Config:
         from_attributes = True
@@ -162,6 +207,25 @@ class SOSReport(Base):
     """Direct SOS reports from citizens"""
     
     __tablename__ = "sos_reports"
+    __table_args__ = (
+        # Active-SOS listings filter on status and order by recency
+        Index("ix_sos_reports_status_reported_at", "status", "reported_at"),
+        # search_sos_by_type filters on type, usually narrowed to active statuses
+        Index("ix_sos_reports_type_status", "emergency_type", "status"),
+        Index("ix_sos_reports_lat_lon", "latitude", "longitude"),
+        # find_nearby_sos_reports filters and KNN-orders on geog
+        *(
+            (Index("ix_sos_reports_geog", "geog", postgresql_using="gist"),)
+            if HAS_GEOMETRY
+            else ()
+        ),
+        # Containment filters on incident metadata; only JSONB supports GIN
+        *(
+            (Index("ix_sos_reports_incident_metadata", "incident_metadata", postgresql_using="gin"),)
+            if JSONColumnType is not JSON
+            else ()
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     reporter_name = Column(String)
@@ -170,6 +234,12 @@ class SOSReport(Base):
     latitude = Column(Float, index=True)
     longitude = Column(Float, index=True)
     geom = Column(Geometry("POINT", srid=4326), index=True) if HAS_GEOMETRY else None
+    # Stored geography derived from latitude/longitude, so radius and KNN
+    # queries hit its GiST index without building a point per query
+    geog = Column(
+        Geography("POINT", srid=4326, spatial_index=False),
+        Computed("geography(ST_SetSRID(ST_MakePoint(longitude, latitude), 4326))", persisted=True),
+    ) if HAS_GEOMETRY else None
     emergency_type = Column(Enum(EmergencyType), index=True)
     description = Column(String)  # User's description of emergency
     severity_score = Column(Float)  # 0-10 rating
@@ -181,10 +251,10 @@ class SOSReport(Base):
     incident_metadata = Column(JSONColumnType, nullable=True)  # Additional info (vulnerable groups, hazards, etc)
     nearest_resource_id = Column(Integer, nullable=True)  # Assigned resource
     crowd_assistance_enabled = Column(Integer, default=1)  # Allow crowd help
-    reported_at = Column(DateTime, default=datetime.utcnow, index=True)
+    reported_at = Column(DateTime, default=utcnow(), index=True)
     acknowledged_at = Column(DateTime, nullable=True)
     resolved_at = Column(DateTime, nullable=True)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=utcnow(), onupdate=utcnow())
     
     class Config:
         from_attributes = True
@@ -194,6 +264,10 @@ class CrowdAssistance(Base):
     """Citizens offering assistance for nearby SOS reports"""
     
     __tablename__ = "crowd_assistance"
+    __table_args__ = (
+        # Offers for one SOS, filtered by availability and read nearest first
+        Index("ix_crowd_assistance_sos_status_distance", "sos_report_id", "availability_status", "distance_km"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     sos_report_id = Column(Integer, index=True)  # FK to SOSReport
@@ -209,9 +283,9 @@ class CrowdAssistance(Base):
     estimated_arrival_min = Column(Integer, nullable=True)  # ETA in minutes
     is_verified = Column(Integer, default=0)  # Verified volunteer
     rating = Column(Float, nullable=True)  # Community rating
-    offered_at = Column(DateTime, default=datetime.utcnow)
+    offered_at = Column(DateTime, default=utcnow())
     accepted_at = Column(DateTime, nullable=True)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=utcnow(), onupdate=utcnow())
     
     class Config:
         from_attributes = True
@@ -231,8 +305,8 @@ class AlertBroadcast(Base):
     longitude = Column(Float)
     broadcaster_type = Column(String)  # "citizen", "emergency_official", "ai_system"
     recipients_reached = Column(Integer, default=0)
-    broadcast_time = Column(DateTime, default=datetime.utcnow, index=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    broadcast_time = Column(DateTime, default=utcnow(), index=True)
+    created_at = Column(DateTime, default=utcnow())
     
     class Config:
         from_attributes = True
@@ -0,0 +1,69 @@
+from typing import Any, Callable, Dict, List, Type, TypeVar
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def json_body(model: Type[Model]) -> Callable:
+    """
+    Dependency that validates the raw request body with pydantic-core's JSON
+    parser in one pass, instead of FastAPI decoding it to Python objects
+    first and validating those. Failures raise the usual 422 with body locs.
+    """
+    async def dependency(request: Request) -> Model:
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            )
+
+    return dependency
+
+
+def json_list_body(model: Type[Model]) -> Callable:
+    """
+    json_body() for a JSON array of a model: one TypeAdapter, built once,
+    validates the whole batch inside pydantic-core
+    """
+    adapter = TypeAdapter(List[model])
+
+    async def dependency(request: Request) -> List[Model]:
+        try:
+            return adapter.validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            )
+
+    return dependency
+
+
+def json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    openapi_extra documenting a json_body() parameter as the route's request
+    body; the schema is inlined, so keep it to models without nested models
+    """
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
+
+
+def json_list_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """openapi_extra for a json_list_body() parameter; same flat-model caveat"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": model.model_json_schema()}
+                }
+            },
+        }
+    }
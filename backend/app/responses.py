@@ -0,0 +1,24 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _model_fragment(obj: Any) -> orjson.Fragment:
+    """
+    orjson `default` hook: splice pydantic models in as JSON their core
+    serializer produced, with no intermediate model_dump() dict
+    """
+    if isinstance(obj, BaseModel):
+        return orjson.Fragment(obj.__pydantic_serializer__.to_json(obj))
+    raise TypeError
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib encoder"""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return orjson.dumps(content, default=_model_fragment, option=orjson.OPT_NON_STR_KEYS)
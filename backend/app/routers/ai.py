@@ -1,8 +1,15 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import Dict, List, Optional
 from datetime import datetime
 from uuid import uuid4
+import asyncio
+import re
 import time
+from types import MappingProxyType
+
+import orjson
+from cachetools import TTLCache
 
 from app.schemas_ai import (
     ChatRequest, ChatResponse,
@@ -12,25 +19,60 @@ from app.schemas_ai import (
     SituationAnalysisRequest, SituationAnalysisResponse,
     DecisionSummary
 )
+from app.cache import get_redis, make_cache_key
+from app.config import settings
 from app.services.ai import (
     ConversationManager, explain_disaster, prioritize_resources,
     generate_safety_instructions, analyze_situation, PromptTemplate,
-    get_severity_description
+    get_severity_description, stream_ai_response
 )
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
-# In-memory conversation store (use Redis or database for production)
-conversations: Dict[str, ConversationManager] = {}
+# In-memory conversation store, used when Redis is not configured.
+# Bounded LRU with TTL so abandoned conversations don't accumulate.
+conversations: TTLCache = TTLCache(
+    maxsize=settings.conversation_cache_size,
+    ttl=settings.conversation_ttl_seconds,
+)
+
+
+# Safety instructions are deterministic for their inputs (the model output is
+# cached server-side), so shared caches may reuse the GET variant's responses.
+# POST responses aren't reused by HTTP caches and carry no caching headers.
+AI_CACHE_CONTROL = f"public, max-age={settings.ai_http_cache_max_age_seconds}"
+
+
+async def load_conversation(conversation_id: str) -> Optional[ConversationManager]:
+    """Look up a conversation in Redis, or in process memory without Redis"""
+    redis = get_redis()
+    if redis is not None:
+        return await ConversationManager.load(redis, conversation_id)
+    return conversations.get(conversation_id)
 
 
-def get_or_create_conversation(conversation_id: Optional[str] = None) -> tuple[str, ConversationManager]:
+async def save_conversation(conversation_id: str, manager: ConversationManager):
+    """Write a conversation back to its store, refreshing its TTL"""
+    redis = get_redis()
+    if redis is not None:
+        await manager.save(redis, conversation_id, settings.conversation_ttl_seconds)
+    else:
+        conversations[conversation_id] = manager
+
+
+async def get_or_create_conversation(conversation_id: Optional[str] = None) -> tuple[str, ConversationManager]:
     """Get existing conversation or create new one"""
-    if not conversation_id or conversation_id not in conversations:
-        conversation_id = str(uuid4())
-        conversations[conversation_id] = ConversationManager()
+    if conversation_id:
+        manager = await load_conversation(conversation_id)
+        if manager is not None:
+            return conversation_id, manager
+    
+    conversation_id = uuid4().hex
+    manager = ConversationManager()
+    if get_redis() is None:
+        conversations[conversation_id] = manager
     
-    return conversation_id, conversations[conversation_id]
+    return conversation_id, manager
 
 
 @router.post("/chat", response_model=ChatResponse)
@@ -42,13 +84,14 @@ async def chat(request: ChatRequest):
     try:
         start_time = time.time()
         
-        conversation_id, manager = get_or_create_conversation(request.conversation_id)
+        conversation_id, manager = await get_or_create_conversation(request.conversation_id)
         
         # Build context-aware system prompt
         system_prompt = build_context_system_prompt(request.context)
         
         # Get AI response
         response_text = await manager.get_response(request.message, system_prompt)
+        await save_conversation(conversation_id, manager)
         
         thinking_time = int((time.time() - start_time) * 1000)
         
@@ -62,6 +105,34 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
 
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Chat with AI assistant, streaming the reply as Server-Sent Events
+    Emits a `conversation` event first, then `token` events, then `done` (or `error`)
+    """
+    conversation_id, manager = await get_or_create_conversation(request.conversation_id)
+    system_prompt = build_context_system_prompt(request.context)
+    
+    async def event_stream():
+        yield sse_event("conversation", {"conversation_id": conversation_id})
+        try:
+            async for token in manager.stream_response(request.message, system_prompt):
+                yield sse_event("token", {"content": token})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Chat error: {str(e)}"})
+            return
+        
+        await save_conversation(conversation_id, manager)
+        yield sse_event("done", {"conversation_id": conversation_id})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/explain-disaster", response_model=DisasterExplanationResponse)
 async def explain_disaster_endpoint(request: DisasterExplanationRequest):
     """
@@ -78,19 +149,50 @@ async def explain_disaster_endpoint(request: DisasterExplanationRequest):
         )
         
         # Parse response to extract structured data
+        parsed = await asyncio.to_thread(parse_explanation, explanation_text)
         return DisasterExplanationResponse(
             explanation=explanation_text,
             disaster_type=request.disaster_type,
             severity_level=get_severity_description(request.severity_score),
-            key_impacts=extract_impacts(explanation_text),
             vulnerable_groups=extract_vulnerable_groups(request.disaster_type),
-            recommended_actions=extract_actions(explanation_text)
+            **parsed
         )
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Explanation error: {str(e)}")
 
 
+@router.post("/explain-disaster/stream")
+async def explain_disaster_stream(request: DisasterExplanationRequest):
+    """
+    Stream an AI explanation of a disaster as Server-Sent Events
+    Emits `token` events as the model writes, then `done` (or `error`)
+    """
+    prompt = PromptTemplate.disaster_explanation(
+        request.disaster_type, request.latitude, request.longitude,
+        request.severity_score, request.context
+    )
+    
+    async def event_stream():
+        try:
+            async for token in stream_ai_response(prompt):
+                yield sse_event("token", {"content": token})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Explanation error: {str(e)}"})
+            return
+        
+        yield sse_event("done", {
+            "disaster_type": request.disaster_type,
+            "severity_level": get_severity_description(request.severity_score),
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/prioritize-resources", response_model=ResourcePriorityResponse)
 async def prioritize_resources_endpoint(request: ResourcePriorityRequest):
     """
@@ -106,20 +208,33 @@ async def prioritize_resources_endpoint(request: ResourcePriorityRequest):
         )
         
         # Parse response to extract structured data
-        priorities = parse_priorities(priority_text, request.available_resources)
-        
-        return ResourcePriorityResponse(
-            priorities=priorities,
-            situation_assessment=extract_situation_assessment(priority_text),
-            critical_challenges=extract_challenges(priority_text),
-            resource_adequacy=extract_adequacy(priority_text),
-            overall_strategy=extract_strategy(priority_text)
+        parsed = await asyncio.to_thread(
+            parse_priority_response, priority_text, request.available_resources
         )
+        return ResourcePriorityResponse(**parsed)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prioritization error: {str(e)}")
 
 
+async def build_safety_instructions(request: SafetyInstructionsRequest) -> SafetyInstructionsResponse:
+    """Generate and parse safety instructions for one request"""
+    instructions_text = await generate_safety_instructions(
+        disaster_type=request.disaster_type,
+        location_type=request.location_type,
+        has_vulnerable_populations=request.has_vulnerable_populations
+    )
+    
+    parsed = await asyncio.to_thread(
+        parse_safety_instructions, instructions_text, request.has_vulnerable_populations
+    )
+    return SafetyInstructionsResponse(
+        disaster_type=request.disaster_type,
+        emergency_contact_info="Call emergency services: 911 (US), 112 (EU), 999 (UK), 100 (India)",
+        **parsed
+    )
+
+
 @router.post("/safety-instructions", response_model=SafetyInstructionsResponse)
 async def get_safety_instructions(request: SafetyInstructionsRequest):
     """
@@ -127,22 +242,44 @@ async def get_safety_instructions(request: SafetyInstructionsRequest):
     Tailored to disaster type, location, and vulnerable populations
     """
     try:
-        instructions_text = await generate_safety_instructions(
-            disaster_type=request.disaster_type,
-            location_type=request.location_type,
-            has_vulnerable_populations=request.has_vulnerable_populations
-        )
-        
-        return SafetyInstructionsResponse(
-            disaster_type=request.disaster_type,
-            immediate_actions=extract_numbered_list("Immediate actions", instructions_text),
-            safety_measures=extract_numbered_list("Safety measures", instructions_text),
-            things_to_avoid=extract_numbered_list("avoid", instructions_text),
-            evacuation_triggers=extract_numbered_list("evacuation", instructions_text),
-            emergency_contact_info="Call emergency services: 911 (US), 112 (EU), 999 (UK), 100 (India)",
-            essential_supplies=extract_numbered_list("supplies", instructions_text),
-            special_considerations=extract_special_considerations(instructions_text) if request.has_vulnerable_populations else None
-        )
+        return await build_safety_instructions(request)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Safety instructions error: {str(e)}")
+
+
+@router.get("/safety-instructions", response_model=SafetyInstructionsResponse)
+async def get_safety_instructions_cacheable(
+    response: Response,
+    disaster_type: str,
+    location_type: str = "urban",
+    has_vulnerable_populations: bool = False,
+):
+    """
+    Safety instructions keyed on the query string, so browsers and shared
+    caches can reuse them; same content as the POST route
+    """
+    try:
+        instructions = await build_safety_instructions(SafetyInstructionsRequest(
+            disaster_type=disaster_type,
+            location_type=location_type,
+            has_vulnerable_populations=has_vulnerable_populations,
+        ))
+        response.headers["Cache-Control"] = AI_CACHE_CONTROL
+        return instructions
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Safety instructions error: {str(e)}")
+
+
+@router.post("/safety-instructions/batch", response_model=List[SafetyInstructionsResponse])
+async def get_safety_instructions_batch(requests: List[SafetyInstructionsRequest]):
+    """
+    Get safety instructions for several hazards at once (e.g. a multi-hazard situation report)
+    The completions are independent, so they are requested concurrently; cached ones skip the network
+    """
+    try:
+        return await asyncio.gather(*(build_safety_instructions(request) for request in requests))
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Safety instructions error: {str(e)}")
@@ -164,14 +301,10 @@ async def analyze_situation_endpoint(request: SituationAnalysisRequest):
             time_since_onset=request.time_since_onset
         )
         
+        parsed = await asyncio.to_thread(parse_situation_analysis, analysis_text)
         return SituationAnalysisResponse(
-            situation_summary=extract_situation_summary(analysis_text),
             severity_level=get_severity_description(request.severity_score),
-            critical_challenges=extract_challenges(analysis_text),
-            resource_adequacy_assessment=extract_adequacy(analysis_text),
-            prioritization_strategy=extract_strategy(analysis_text),
-            next_30_minute_actions=extract_action_items(analysis_text),
-            forecast=extract_forecast(analysis_text)
+            **parsed
         )
     
     except Exception as e:
@@ -190,12 +323,16 @@ async def get_decision(
     Synthesizes disaster explanation, resource prioritization, and safety measures
     """
     try:
-        # Get resource priorities
-        priorities = await prioritize_resources(
-            disaster_type=disaster_type,
-            severity_score=severity_score,
-            available_resources=available_resources,
-            current_situation=current_situation
+        # Resource priorities and civilian safety guidance are independent,
+        # so request both from the model concurrently
+        priorities, safety_text = await asyncio.gather(
+            prioritize_resources(
+                disaster_type=disaster_type,
+                severity_score=severity_score,
+                available_resources=available_resources,
+                current_situation=current_situation
+            ),
+            generate_safety_instructions(disaster_type=disaster_type)
         )
         
         # Extract top recommendation
@@ -211,7 +348,7 @@ async def get_decision(
                 "Resource type match",
                 "Availability status"
             ],
-            alternative_actions=[],
+            alternative_actions=extract_numbered_list("Immediate actions", safety_text)[:3],
             risks=["Communication delays", "Resource unavailability"],
             benefits=["Rapid response", "Appropriate resource match"]
         )
@@ -221,13 +358,26 @@ async def get_decision(
 
 
 @router.get("/conversations/{conversation_id}")
-async def get_conversation_history(conversation_id: str, limit: int = 10):
-    """Get conversation history"""
-    if conversation_id not in conversations:
+async def get_conversation_history(
+    conversation_id: str,
+    request: Request,
+    response: Response,
+    limit: int = 10
+):
+    """Get conversation history; supports If-None-Match revalidation"""
+    manager = await load_conversation(conversation_id)
+    if manager is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    manager = conversations[conversation_id]
-    messages = manager.get_messages()[-limit:]
+    messages = manager.recent_messages(limit)
+    
+    # History changes with every chat turn, so clients must revalidate,
+    # but an unchanged conversation costs only a 304
+    etag = '"' + make_cache_key("history", messages).rsplit(":", 1)[1] + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     
     return {
         "conversation_id": conversation_id,
@@ -239,15 +389,68 @@ async def get_conversation_history(conversation_id: str, limit: int = 10):
 @router.delete("/conversations/{conversation_id}")
 async def clear_conversation(conversation_id: str):
     """Clear a conversation"""
-    if conversation_id in conversations:
-        conversations[conversation_id].clear()
-        return {"status": "cleared", "conversation_id": conversation_id}
+    manager = await load_conversation(conversation_id)
+    if manager is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
     
-    raise HTTPException(status_code=404, detail="Conversation not found")
+    manager.clear()
+    await save_conversation(conversation_id, manager)
+    return {"status": "cleared", "conversation_id": conversation_id}
 
 
 # Helper functions for parsing AI responses
 
+# Bundled parsers: each runs every extraction pass for one endpoint so the
+# whole scan can be handed to a worker thread with a single to_thread call.
+
+def parse_explanation(text: str) -> Dict:
+    """Extract structured fields from a disaster explanation"""
+    return {
+        "key_impacts": extract_impacts(text),
+        "recommended_actions": extract_actions(text),
+    }
+
+
+def parse_priority_response(text: str, resources: List[Dict]) -> Dict:
+    """Extract structured fields from a resource prioritization"""
+    return {
+        "priorities": parse_priorities(text, resources),
+        "situation_assessment": extract_situation_assessment(text),
+        "critical_challenges": extract_challenges(text),
+        "resource_adequacy": extract_adequacy(text),
+        "overall_strategy": extract_strategy(text),
+    }
+
+
+def parse_safety_instructions(text: str, has_vulnerable_populations: bool) -> Dict:
+    """Extract structured fields from safety instructions"""
+    return {
+        "immediate_actions": extract_numbered_list("Immediate actions", text),
+        "safety_measures": extract_numbered_list("Safety measures", text),
+        "things_to_avoid": extract_numbered_list("avoid", text),
+        "evacuation_triggers": extract_numbered_list("evacuation", text),
+        "essential_supplies": extract_numbered_list("supplies", text),
+        "special_considerations": extract_special_considerations(text) if has_vulnerable_populations else None,
+    }
+
+
+def parse_situation_analysis(text: str) -> Dict:
+    """Extract structured fields from a situation analysis"""
+    return {
+        "situation_summary": extract_situation_summary(text),
+        "critical_challenges": extract_challenges(text),
+        "resource_adequacy_assessment": extract_adequacy(text),
+        "prioritization_strategy": extract_strategy(text),
+        "next_30_minute_actions": extract_action_items(text),
+        "forecast": extract_forecast(text),
+    }
+
+
+def sse_event(event: str, data: Dict) -> str:
+    """Format one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
 def build_context_system_prompt(context: Optional[Dict]) -> str:
     """Build system prompt with context"""
     base_prompt = """You are an AI Emergency Response Assistant for disaster management. 
@@ -266,84 +469,100 @@ def build_context_system_prompt(context: Optional[Dict]) -> str:
     return base_prompt
 
 
+# Keyword tables for the response parsers, compiled once at import
+IMPACT_RE = re.compile(r"impact|hazard|risk|danger", re.IGNORECASE)
+ACTION_RE = re.compile(r"action|recommend|should|must", re.IGNORECASE)
+ASSESSMENT_RE = re.compile(r"assess|situation", re.IGNORECASE)
+CHALLENGE_RE = re.compile(r"challenge|difficult|obstacle|problem", re.IGNORECASE)
+ADEQUACY_RE = re.compile(r"adequate|sufficient", re.IGNORECASE)
+STRATEGY_RE = re.compile(r"strateg|approach", re.IGNORECASE)
+SPECIAL_RE = re.compile(r"special|vulnerable|elderly", re.IGNORECASE)
+ACTION_ITEM_RE = re.compile(r"action|step|item|task", re.IGNORECASE)
+FORECAST_RE = re.compile(r"forecast|expect|trend|duration", re.IGNORECASE)
+
+VULNERABLE_GROUPS = MappingProxyType({
+    "fire": ("People with mobility issues", "Children", "Elderly", "Hospitalized patients"),
+    "flood": ("Non-swimmers", "Elderly", "Young children", "Disabled persons"),
+    "earthquake": ("Children", "Elderly", "Pregnant women", "People with disabilities"),
+    "chemical": ("People with respiratory conditions", "Elderly", "Young children"),
+    "medical": ("Immunocompromised", "Chronic disease patients", "Pregnant women"),
+})
+DEFAULT_VULNERABLE_GROUPS = ("Elderly", "Children", "Disabled persons")
+
+
+def _matching_lines(pattern: re.Pattern, text: str, limit: int = 5) -> List[str]:
+    """Collect up to `limit` stripped lines matching a keyword pattern"""
+    matches = []
+    for line in text.splitlines():
+        if pattern.search(line):
+            matches.append(line.strip())
+            if len(matches) == limit:
+                break
+    return matches
+
+
+def _first_matching_line(pattern: re.Pattern, text: str) -> Optional[str]:
+    """Return the first stripped line matching a keyword pattern"""
+    for line in text.splitlines():
+        if pattern.search(line):
+            return line.strip()
+    return None
+
+
 def extract_impacts(text: str) -> List[str]:
     """Extract key impacts from text"""
-    impacts = []
-    for line in text.split('\n'):
-        if any(word in line.lower() for word in ['impact', 'hazard', 'risk', 'danger']):
-            impacts.append(line.strip())
-    return impacts[:5] if impacts else ["See explanation for details"]
+    return _matching_lines(IMPACT_RE, text) or ["See explanation for details"]
 
 
 def extract_vulnerable_groups(disaster_type: str) -> List[str]:
     """Get vulnerable groups for disaster type"""
-    groups = {
-        "fire": ["People with mobility issues", "Children", "Elderly", "Hospitalized patients"],
-        "flood": ["Non-swimmers", "Elderly", "Young children", "Disabled persons"],
-        "earthquake": ["Children", "Elderly", "Pregnant women", "People with disabilities"],
-        "chemical": ["People with respiratory conditions", "Elderly", "Young children"],
-        "medical": ["Immunocompromised", "Chronic disease patients", "Pregnant women"],
-    }
-    return groups.get(disaster_type.lower(), ["Elderly", "Children", "Disabled persons"])
+    return list(VULNERABLE_GROUPS.get(disaster_type.lower(), DEFAULT_VULNERABLE_GROUPS))
 
 
 def extract_actions(text: str) -> List[str]:
     """Extract recommended actions from text"""
-    actions = []
-    for line in text.split('\n'):
-        if any(word in line.lower() for word in ['action', 'recommend', 'should', 'must']):
-            actions.append(line.strip())
-    return actions[:5] if actions else ["See explanation for details"]
+    return _matching_lines(ACTION_RE, text) or ["See explanation for details"]
 
 
 def extract_situation_assessment(text: str) -> str:
     """Extract situation assessment"""
     lines = text.split('\n')
     for i, line in enumerate(lines):
-        if 'assess' in line.lower() or 'situation' in line.lower():
+        if ASSESSMENT_RE.search(line):
             return lines[i:i+3].__str__().replace("['", "").replace("']", "").replace("', '", " ")
     return text[:200]
 
 
 def extract_challenges(text: str) -> List[str]:
     """Extract critical challenges"""
-    challenges = []
-    for line in text.split('\n'):
-        if any(word in line.lower() for word in ['challenge', 'difficult', 'obstacle', 'problem']):
-            challenges.append(line.strip())
-    return challenges[:5] if challenges else ["Resource coordination", "Information flow"]
+    return _matching_lines(CHALLENGE_RE, text) or ["Resource coordination", "Information flow"]
 
 
 def extract_adequacy(text: str) -> str:
     """Extract resource adequacy assessment"""
-    for line in text.split('\n'):
-        if 'adequate' in line.lower() or 'sufficient' in line.lower():
-            return line.strip()
-    return "Resources need to be assessed"
+    return _first_matching_line(ADEQUACY_RE, text) or "Resources need to be assessed"
 
 
 def extract_strategy(text: str) -> str:
     """Extract overall strategy"""
-    for line in text.split('\n'):
-        if 'strateg' in line.lower() or 'approach' in line.lower():
-            return line.strip()
-    return text[:100]
+    return _first_matching_line(STRATEGY_RE, text) or text[:100]
 
 
 def extract_numbered_list(keyword: str, text: str) -> List[str]:
     """Extract numbered list from text"""
     items = []
-    lines = text.split('\n')
+    keyword = keyword.lower()
     capture = False
     
-    for line in lines:
-        if keyword.lower() in line.lower():
+    for line in text.splitlines():
+        stripped = line.strip()
+        if keyword in line.lower():
             capture = True
             continue
         if capture:
-            if line.strip() and (line[0].isdigit() or line.strip().startswith('-')):
-                items.append(line.strip().lstrip('0123456789.- '))
-            elif not line.strip():
+            if stripped and (line[0].isdigit() or stripped.startswith('-')):
+                items.append(stripped.lstrip('0123456789.- '))
+            elif not stripped:
                 break
     
     return items if items else ["See instructions for details"]
@@ -351,10 +570,7 @@ def extract_numbered_list(keyword: str, text: str) -> List[str]:
 
 def extract_special_considerations(text: str) -> str:
     """Extract special considerations"""
-    for line in text.split('\n'):
-        if 'special' in line.lower() or 'vulnerable' in line.lower() or 'elderly' in line.lower():
-            return line.strip()
-    return None
+    return _first_matching_line(SPECIAL_RE, text)
 
 
 def extract_situation_summary(text: str) -> str:
@@ -365,19 +581,12 @@ def extract_situation_summary(text: str) -> str:
 
 def extract_action_items(text: str) -> List[str]:
     """Extract action items"""
-    items = []
-    for line in text.split('\n'):
-        if any(word in line.lower() for word in ['action', 'step', 'item', 'task']):
-            items.append(line.strip())
-    return items[:5] if items else ["Mobilize resources", "Establish coordination", "Begin response"]
+    return _matching_lines(ACTION_ITEM_RE, text) or ["Mobilize resources", "Establish coordination", "Begin response"]
 
 
 def extract_forecast(text: str) -> str:
     """Extract forecast information"""
-    for line in text.split('\n'):
-        if any(word in line.lower() for word in ['forecast', 'expect', 'trend', 'duration']):
-            return line.strip()
-    return None
+    return _first_matching_line(FORECAST_RE, text)
 
 
 def parse_priorities(text: str, resources: List[Dict]) -> List[ResourcePriority]:
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel, field_validator
 import httpx
 from app.models import UserRole
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models import User
 from app.config import settings
 from app.auth import (
@@ -175,7 +177,7 @@ def get_google_auth_config():
 
 
 @router.post("/google")
-async def google_login(request: GoogleAuthRequest, db: Session = Depends(get_db)):
+async def google_login(request: GoogleAuthRequest, db: AsyncSession = Depends(get_async_db)):
     configured_google_client_id = get_configured_google_client_id()
 
     if request.id_token == "mock_google_token_for_testing":
@@ -211,7 +213,8 @@ async def google_login(request: GoogleAuthRequest, db: Session = Depends(get_db)
             raise HTTPException(status_code=401, detail="Google token audience mismatch")
 
 
-    user = db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
     if not user:
         user = User(
             name=name,
@@ -220,8 +223,8 @@ async def google_login(request: GoogleAuthRequest, db: Session = Depends(get_db)
             role=UserRole.CITIZEN,
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
 
     role_value = user.role.value if hasattr(user.role, "value") else str(user.role)
     allowed_roles = get_allowed_mission_roles(role_value)
@@ -1,42 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import TypeAdapter
+from sqlalchemy import func, lambda_stmt, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+import orjson
 from app.auth import require_mission_roles
 
 try:
-    from app.database import get_db
+    from app.cache import cache_generation, cache_get, cache_set, invalidate_namespace, make_cache_key
+    from app.config import settings
+    from app.database import get_async_db
     from app.schemas import (
         DisasterValidationRequest,
         DisasterValidationResponse,
         DisasterCreate,
         DisasterResponse,
     )
-    from app.models import Disaster, DisasterStatus
+    from app.models import Disaster, DisasterStatus, utcnow
     from app.services.disaster_validator import validate_disaster
 except ImportError:
-    from database import get_db
+    from cache import cache_generation, cache_get, cache_set, invalidate_namespace, make_cache_key
+    from config import settings
+    from database import get_async_db
     from schemas import (
         DisasterValidationRequest,
         DisasterValidationResponse,
         DisasterCreate,
         DisasterResponse,
     )
-    from models import Disaster, DisasterStatus
+    from models import Disaster, DisasterStatus, utcnow
     from services.disaster_validator import validate_disaster
 
 router = APIRouter(prefix="/disasters", tags=["disasters"])
 
+# Cached list/stats responses live under this namespace; writes bump its
+# generation so every cached variant is dropped at once
+DISASTER_CACHE_NAMESPACE = "disasters"
+DISASTER_LIST_ADAPTER = TypeAdapter(List[DisasterResponse])
+
+# Status strings accepted by update_disaster_status
+DISASTER_STATUS_BY_VALUE = {status.value: status for status in DisasterStatus}
+
+
+async def disaster_cache_key(name: str, params: dict) -> str:
+    """Cache key for a disaster read under the namespace's current generation"""
+    generation = await cache_generation(DISASTER_CACHE_NAMESPACE)
+    return make_cache_key(f"{DISASTER_CACHE_NAMESPACE}:{generation}:{name}", params)
+
 
 @router.post("/validate", response_model=DisasterValidationResponse)
-def validate_disaster_report(
+async def validate_disaster_report(
     request: DisasterValidationRequest,
-    db: Session = Depends(get_db),
     _mission: str = Depends(require_mission_roles("admin", "field", "analyst"))
 ):
     """
     Validate a disaster report and assess its credibility.
     Returns validation score (0-100) and recommended actions.
+    Pure rule evaluation: no DB session and no threadpool hop.
     """
     try:
         validation_result = validate_disaster(request)
@@ -46,9 +67,9 @@ def validate_disaster_report(
 
 
 @router.post("/create", response_model=DisasterResponse)
-def create_disaster(
+async def create_disaster(
     request: DisasterCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _mission: str = Depends(require_mission_roles("admin", "field"))
 ):
     """
@@ -66,117 +87,185 @@ def create_disaster(
             num_casualties=request.num_casualties,
             description=request.description,
             source=request.source,
-            metadata=request.metadata,
+            extra_metadata=request.metadata,
             is_validated=1 if request.is_validated else 0,
             validation_score=request.validation_score,
             status=DisasterStatus.VALIDATED if request.is_validated else DisasterStatus.REPORTED,
-            validated_at=datetime.utcnow() if request.is_validated else None,
+            validated_at=utcnow() if request.is_validated else None,
         )
         
         db.add(disaster)
-        db.commit()
-        db.refresh(disaster)
+        await db.commit()
+        # id and column defaults come back on the INSERT's RETURNING; only a
+        # SQL-assigned validated_at still has to be read back
+        if request.is_validated:
+            await db.refresh(disaster, ["validated_at"])
+        await invalidate_namespace(DISASTER_CACHE_NAMESPACE)
         
         return disaster
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Creation error: {str(e)}")
 
 
 @router.get("/{disaster_id}", response_model=DisasterResponse)
-def get_disaster(
+async def get_disaster(
     disaster_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _mission: str = Depends(require_mission_roles("admin", "field", "analyst"))
 ):
     """
     Get a specific disaster by ID.
     """
-    disaster = db.query(Disaster).filter(Disaster.id == disaster_id).first()
+    disaster = await db.get(Disaster, disaster_id)
     if not disaster:
         raise HTTPException(status_code=404, detail="Disaster not found")
     
     return disaster
 
 
+# Columns DisasterResponse reads; list queries select just these as plain rows
+# instead of materializing full ORM instances
+DISASTER_RESPONSE_COLUMNS = (
+    Disaster.id,
+    Disaster.type,
+    Disaster.status,
+    Disaster.latitude,
+    Disaster.longitude,
+    Disaster.severity_score,
+    Disaster.is_validated,
+    Disaster.validation_score,
+    Disaster.affected_area_radius_km,
+    Disaster.estimated_affected_population,
+    Disaster.num_casualties,
+    Disaster.description,
+    Disaster.source,
+    Disaster.extra_metadata,
+    Disaster.reported_at,
+    Disaster.validated_at,
+    Disaster.resolved_at,
+)
+
+
 @router.get("/", response_model=List[DisasterResponse])
-def list_disasters(
+async def list_disasters(
     status: str = None,
     validated_only: bool = False,
-    db: Session = Depends(get_db),
+    limit: int = Query(100, ge=1, le=1000),
+    after_id: Optional[int] = Query(None, description="Return disasters with id greater than this cursor"),
+    db: AsyncSession = Depends(get_async_db),
     _mission: str = Depends(require_mission_roles("admin", "field", "analyst"))
 ):
     """
-    List all disasters with optional filtering by status or validation state.
+    List disasters in id order with optional filtering by status or validation state.
+    Keyset-paginated: pass the last id of a page as `after_id` to get the next one.
+    Serialized responses are cached briefly per filter combination.
     """
-    query = db.query(Disaster)
+    key = await disaster_cache_key(
+        "list",
+        {"status": status, "validated_only": validated_only, "limit": limit, "after_id": after_id},
+    )
+    cached = await cache_get(key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
+    # lambda_stmt caches the constructed statement per filter combination, so
+    # repeat requests skip building and compiling the SELECT
+    query = lambda_stmt(lambda: select(*DISASTER_RESPONSE_COLUMNS))
     
     if status:
-        query = query.filter(Disaster.status == status)
+        query += lambda s: s.where(Disaster.status == status)
     
     if validated_only:
-        query = query.filter(Disaster.is_validated == 1)
+        query += lambda s: s.where(Disaster.is_validated == 1)
+    
+    if after_id is not None:
+        query += lambda s: s.where(Disaster.id > after_id)
     
-    disasters = query.all()
-    return disasters
+    query += lambda s: s.order_by(Disaster.id).limit(limit)
+    rows = [dict(row) for row in (await db.execute(query)).mappings()]
+    body = DISASTER_LIST_ADAPTER.dump_json(DISASTER_LIST_ADAPTER.validate_python(rows))
+    await cache_set(key, body.decode(), settings.disaster_list_cache_ttl_seconds)
+    return Response(content=body, media_type="application/json")
 
 
 @router.put("/{disaster_id}/status", response_model=DisasterResponse)
-def update_disaster_status(
+async def update_disaster_status(
     disaster_id: int,
     new_status: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _mission: str = Depends(require_mission_roles("admin", "field"))
 ):
     """
     Update the status of a disaster (e.g., from REPORTED to ACTIVE, or ACTIVE to RESOLVED).
     """
-    disaster = db.query(Disaster).filter(Disaster.id == disaster_id).first()
+    status = DISASTER_STATUS_BY_VALUE.get(new_status)
+    if status is None:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {new_status}")
+    
+    disaster = await db.get(Disaster, disaster_id)
     if not disaster:
         raise HTTPException(status_code=404, detail="Disaster not found")
     
     try:
-        disaster.status = DisasterStatus(new_status)
+        disaster.status = status
         
-        if new_status == "resolved":
-            disaster.resolved_at = datetime.utcnow()
+        # Timestamps are filled in by the database: resolved_at from the SQL
+        # expression, updated_at from the column's onupdate
+        if status == DisasterStatus.RESOLVED:
+            disaster.resolved_at = utcnow()
         
-        disaster.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(disaster)
+        await db.commit()
+        await db.refresh(disaster)
+        await invalidate_namespace(DISASTER_CACHE_NAMESPACE)
         
         return disaster
-    except ValueError:
-        raise HTTPException(status_code=400, detail=f"Invalid status: {new_status}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Update error: {str(e)}")
 
 
 @router.get("/stats/summary")
-def get_disaster_statistics(
-    db: Session = Depends(get_db),
+async def get_disaster_statistics(
+    db: AsyncSession = Depends(get_async_db),
     _mission: str = Depends(require_mission_roles("admin", "field", "analyst"))
 ):
     """
     Get summary statistics about disasters.
     """
-    total = db.query(Disaster).count()
-    validated = db.query(Disaster).filter(Disaster.is_validated == 1).count()
-    active = db.query(Disaster).filter(Disaster.status == DisasterStatus.ACTIVE).count()
-    by_type = db.query(Disaster.type).all()
+    key = await disaster_cache_key("stats", {})
+    cached = await cache_get(key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
+    # One grouped aggregate; the handful of (type, status, validated) groups
+    # are folded into the totals here
+    groups = (
+        await db.execute(
+            select(Disaster.type, Disaster.status, Disaster.is_validated, func.count())
+            .group_by(Disaster.type, Disaster.status, Disaster.is_validated)
+        )
+    ).all()
     
+    total = validated = active = 0
     type_counts = {}
-    for disaster_type in by_type:
-        type_counts[disaster_type[0].value] = type_counts.get(disaster_type[0].value, 0) + 1
+    for disaster_type, status, is_validated, count in groups:
+        total += count
+        if is_validated == 1:
+            validated += count
+        if status == DisasterStatus.ACTIVE:
+            active += count
+        type_counts[disaster_type.value] = type_counts.get(disaster_type.value, 0) + count
     
-    return {
+    stats = {
         "total_disasters": total,
         "validated_disasters": validated,
         "active_disasters": active,
         "validation_rate": round((validated / total * 100) if total > 0 else 0, 2),
         "by_type": type_counts
     }
+    await cache_set(key, orjson.dumps(stats).decode(), settings.disaster_stats_cache_ttl_seconds)
+    return stats
 
 
 # Import the new services
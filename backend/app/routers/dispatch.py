@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from geoalchemy2.functions import ST_DWithin, ST_Distance
+from sqlalchemy import DateTime, Float, Integer, String, cast, func, literal, null, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.schemas import DispatchRequest, DispatchRecommendation
-from app.models import DispatchRecord, Resource, ResourceStatus
-from app.services.dispatch import auto_dispatch
+from app.models import HAS_GEOMETRY, DispatchRecord, Resource, ResourceStatus, ResourceType
+from app.services.dispatch import auto_dispatch, estimate_arrival_time, ewkt_point, haversine_distance, within_bounding_box
 from app.auth import require_mission_roles
 from typing import List
+from datetime import datetime
 
 router = APIRouter(prefix="/dispatch", tags=["dispatch"])
 
@@ -28,57 +34,203 @@ def auto_dispatch_resource(
         raise HTTPException(status_code=500, detail=f"Dispatch error: {str(e)}")
 
 
+ACTIVE_DISPATCH_BATCH_SIZE = 500
+# DispatchRecord.status is a plain String column, so these bind as-is
+ACTIVE_DISPATCH_STATUSES = ("dispatched", "en-route")
+
+
+def _active_dispatch_row(record: DispatchRecord, resource: Resource) -> dict:
+    return {
+        "dispatch_id": record.id,
+        "resource_id": resource.id,
+        "resource_name": resource.name,
+        "resource_type": resource.type,
+        "current_location": {
+            "latitude": resource.latitude,
+            "longitude": resource.longitude
+        },
+        "disaster_location": {
+            "latitude": record.disaster_lat,
+            "longitude": record.disaster_lon
+        },
+        "disaster_type": record.disaster_type,
+        "severity_score": record.severity_score,
+        "distance_km": record.distance_km,
+        "dispatch_time": record.dispatch_time,
+        "estimated_arrival": record.estimated_arrival,
+        "status": record.status
+    }
+
+
 @router.get("/active")
-def get_active_dispatch_records(
-    db: Session = Depends(get_db),
+async def get_active_dispatch_records(
+    db: AsyncSession = Depends(get_async_db),
     _mission: str = Depends(require_mission_roles("admin", "field", "analyst")),
 ):
     """Get all active dispatch records"""
-    records = db.query(DispatchRecord).filter(
-        DispatchRecord.status.in_(["dispatched", "en-route"])
-    ).all()
+    # One joined query instead of a Resource lookup per record; the inner
+    # join drops records whose resource no longer exists, as before
+    stmt = (
+        select(DispatchRecord, Resource)
+        .join(Resource, Resource.id == DispatchRecord.resource_id)
+        .where(DispatchRecord.status.in_(ACTIVE_DISPATCH_STATUSES))
+        .execution_options(yield_per=ACTIVE_DISPATCH_BATCH_SIZE)
+    )
+
+    async def body():
+        # Still a plain JSON array for existing clients, but written out
+        # batch by batch so a surge doesn't hold every row in memory
+        result = await db.stream(stmt)
+        separator = b"["
+        async for partition in result.partitions():
+            chunk = b",".join(
+                orjson.dumps(_active_dispatch_row(record, resource))
+                for record, resource in partition
+            )
+            yield separator + chunk
+            separator = b","
+            db.expunge_all()
+        yield b"[]" if separator == b"[" else b"]"
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
+def _dashboard_statement(latitude: float, longitude: float, radius_km: float):
+    """
+    Active dispatches and nearby available resources as one UNION ALL over
+    two CTEs, so the dashboard costs a single round trip
+    """
+    active = (
+        select(
+            literal("dispatch").label("kind"),
+            DispatchRecord.id.label("dispatch_id"),
+            Resource.id.label("resource_id"),
+            Resource.name.label("resource_name"),
+            Resource.type.label("resource_type"),
+            Resource.latitude.label("latitude"),
+            Resource.longitude.label("longitude"),
+            DispatchRecord.disaster_lat.label("disaster_lat"),
+            DispatchRecord.disaster_lon.label("disaster_lon"),
+            DispatchRecord.disaster_type.label("disaster_type"),
+            DispatchRecord.severity_score.label("severity_score"),
+            DispatchRecord.distance_km.label("distance_km"),
+            DispatchRecord.dispatch_time.label("dispatch_time"),
+            DispatchRecord.estimated_arrival.label("estimated_arrival"),
+            DispatchRecord.status.label("status"),
+        )
+        .join(Resource, Resource.id == DispatchRecord.resource_id)
+        .where(DispatchRecord.status.in_(ACTIVE_DISPATCH_STATUSES))
+        .cte("active")
+    )
+    
+    if HAS_GEOMETRY:
+        point = func.ST_GeogFromText(ewkt_point(latitude, longitude))
+        geography = func.geography(Resource.geom)
+        distance = ST_Distance(geography, point) / 1000.0
+        in_range = ST_DWithin(geography, point, radius_km * 1000.0)
+    else:
+        # No PostGIS: a bounding box narrows it in SQL, the exact radius
+        # check happens on the (few) returned rows
+        distance = cast(null(), Float)
+        in_range = within_bounding_box(Resource.latitude, Resource.longitude, latitude, longitude, radius_km)
     
-    result = []
-    for record in records:
-        resource = db.query(Resource).filter(Resource.id == record.resource_id).first()
-        if resource:
-            result.append({
-                "dispatch_id": record.id,
-                "resource_id": resource.id,
-                "resource_name": resource.name,
-                "resource_type": resource.type,
+    nearby = (
+        select(
+            literal("nearby").label("kind"),
+            cast(null(), Integer).label("dispatch_id"),
+            Resource.id.label("resource_id"),
+            Resource.name.label("resource_name"),
+            Resource.type.label("resource_type"),
+            Resource.latitude.label("latitude"),
+            Resource.longitude.label("longitude"),
+            cast(null(), Float).label("disaster_lat"),
+            cast(null(), Float).label("disaster_lon"),
+            cast(null(), String).label("disaster_type"),
+            cast(null(), Float).label("severity_score"),
+            distance.label("distance_km"),
+            cast(null(), DateTime).label("dispatch_time"),
+            cast(null(), DateTime).label("estimated_arrival"),
+            cast(null(), String).label("status"),
+        )
+        .where(Resource.status == ResourceStatus.AVAILABLE, in_range)
+        .cte("nearby")
+    )
+    
+    return union_all(select(active), select(nearby))
+
+
+@router.get("/dashboard")
+async def get_dispatch_dashboard(
+    latitude: float = Query(...),
+    longitude: float = Query(...),
+    radius_km: float = Query(50.0, gt=0),
+    db: AsyncSession = Depends(get_async_db),
+    _mission: str = Depends(require_mission_roles("admin", "field", "analyst")),
+):
+    """Active dispatch records plus available resources near a point, in one query"""
+    rows = (await db.execute(_dashboard_statement(latitude, longitude, radius_km))).mappings().all()
+    
+    active_dispatches = []
+    nearby_resources = []
+    for row in rows:
+        if row["kind"] == "dispatch":
+            active_dispatches.append({
+                "dispatch_id": row["dispatch_id"],
+                "resource_id": row["resource_id"],
+                "resource_name": row["resource_name"],
+                "resource_type": row["resource_type"],
                 "current_location": {
-                    "latitude": resource.latitude,
-                    "longitude": resource.longitude
+                    "latitude": row["latitude"],
+                    "longitude": row["longitude"]
                 },
                 "disaster_location": {
-                    "latitude": record.disaster_lat,
-                    "longitude": record.disaster_lon
+                    "latitude": row["disaster_lat"],
+                    "longitude": row["disaster_lon"]
                 },
-                "disaster_type": record.disaster_type,
-                "severity_score": record.severity_score,
-                "distance_km": record.distance_km,
-                "dispatch_time": record.dispatch_time,
-                "estimated_arrival": record.estimated_arrival,
-                "status": record.status
+                "disaster_type": row["disaster_type"],
+                "severity_score": row["severity_score"],
+                "distance_km": row["distance_km"],
+                "dispatch_time": row["dispatch_time"],
+                "estimated_arrival": row["estimated_arrival"],
+                "status": row["status"]
             })
+            continue
+        
+        distance = row["distance_km"]
+        if distance is None:
+            distance = haversine_distance(latitude, longitude, row["latitude"], row["longitude"])
+            if distance > radius_km:
+                continue
+        arrival_time = estimate_arrival_time(distance, ResourceType(row["resource_type"]))
+        nearby_resources.append({
+            "resource_id": row["resource_id"],
+            "resource_name": row["resource_name"],
+            "resource_type": row["resource_type"],
+            "current_location": {
+                "latitude": row["latitude"],
+                "longitude": row["longitude"]
+            },
+            "distance_km": round(distance, 2),
+            "estimated_arrival_minutes": round(arrival_time.total_seconds() / 60, 1)
+        })
     
-    return result
+    nearby_resources.sort(key=lambda item: item["distance_km"])
+    return {"active_dispatches": active_dispatches, "nearby_resources": nearby_resources}
 
 
 @router.get("/{dispatch_id}")
-def get_dispatch_record(
+async def get_dispatch_record(
     dispatch_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _mission: str = Depends(require_mission_roles("admin", "field", "analyst")),
 ):
     """Get specific dispatch record"""
-    record = db.query(DispatchRecord).filter(DispatchRecord.id == dispatch_id).first()
+    record = await db.get(DispatchRecord, dispatch_id)
     
     if not record:
         raise HTTPException(status_code=404, detail="Dispatch record not found")
     
-    resource = db.query(Resource).filter(Resource.id == record.resource_id).first()
+    resource = await db.get(Resource, record.resource_id) if record.resource_id is not None else None
     
     return {
         "id": record.id,
@@ -97,14 +249,14 @@ def get_dispatch_record(
 
 
 @router.put("/{dispatch_id}/status")
-def update_dispatch_status(
+async def update_dispatch_status(
     dispatch_id: int,
     new_status: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _mission: str = Depends(require_mission_roles("admin", "field")),
 ):
     """Update dispatch status"""
-    record = db.query(DispatchRecord).filter(DispatchRecord.id == dispatch_id).first()
+    record = await db.get(DispatchRecord, dispatch_id)
     
     if not record:
         raise HTTPException(status_code=404, detail="Dispatch record not found")
@@ -113,18 +265,20 @@ def update_dispatch_status(
     record.status = new_status
     
     if new_status == "completed" and record.actual_arrival is None:
-        from datetime import datetime
+        # Set in Python rather than by the DB: the response below reads it
+        # straight back and the async session can't lazily reload it
         record.actual_arrival = datetime.utcnow()
         
-        # Mark resource as available again
-        resource = db.query(Resource).filter(Resource.id == record.resource_id).first()
-        if resource:
-            resource.status = ResourceStatus.AVAILABLE
-            db.add(resource)
+        # Mark resource as available again; a bare UPDATE skips loading it
+        await db.execute(
+            update(Resource)
+            .where(Resource.id == record.resource_id)
+            .values(status=ResourceStatus.AVAILABLE)
+        )
     
-    db.add(record)
-    db.commit()
-    db.refresh(record)
+    # Both changes go out in one transaction; the record stays loaded after
+    # commit (expire_on_commit=False), so no refresh SELECT is needed
+    await db.commit()
     
     return {
         "dispatch_id": record.id,
@@ -74,7 +74,7 @@ def get_shelter(
     _mission: str = Depends(require_mission_roles("admin", "field", "analyst"))
 ):
     """Get a specific shelter"""
-    shelter = db.query(Shelter).filter(Shelter.id == shelter_id).first()
+    shelter = db.get(Shelter, shelter_id)
     if not shelter:
         raise HTTPException(status_code=404, detail="Shelter not found")
     return shelter
@@ -87,7 +87,7 @@ def update_shelter_occupancy(
     _mission: str = Depends(require_mission_roles("admin", "field"))
 ):
     """Update shelter occupancy"""
-    shelter = db.query(Shelter).filter(Shelter.id == shelter_id).first()
+    shelter = db.get(Shelter, shelter_id)
     if not shelter:
         raise HTTPException(status_code=404, detail="Shelter not found")
 
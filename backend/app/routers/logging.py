@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
@@ -58,7 +59,7 @@ def get_logs_summary(
     # Count by level
     levels = db.query(
         OperationalLog.level,
-        OperationalLog.level.count()
+        func.count(OperationalLog.level)
     ).filter(
         OperationalLog.timestamp >= since
     ).group_by(OperationalLog.level).all()
@@ -68,7 +69,7 @@ def get_logs_summary(
     # Count by category
     categories = db.query(
         OperationalLog.category,
-        OperationalLog.category.count()
+        func.count(OperationalLog.category)
     ).filter(
         OperationalLog.timestamp >= since
     ).group_by(OperationalLog.category).all()
@@ -110,7 +111,7 @@ def get_logs_timeline(
     hourly_stats = db.query(
         OperationalLog.timestamp.hour.label('hour'),
         OperationalLog.level,
-        OperationalLog.level.count()
+        func.count(OperationalLog.level)
     ).filter(
         OperationalLog.timestamp >= since
     ).group_by(
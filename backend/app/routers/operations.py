@@ -123,7 +123,7 @@ def review_citizen_update(
     if request.status not in {"verified", "rejected"}:
         raise HTTPException(status_code=400, detail="Invalid status. Use 'verified' or 'rejected'")
 
-    row = db.query(CitizenUpdate).filter(CitizenUpdate.id == update_id).first()
+    row = db.get(CitizenUpdate, update_id)
     if not row:
         raise HTTPException(status_code=404, detail="Citizen update not found")
 
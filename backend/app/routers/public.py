@@ -4,14 +4,17 @@ from pathlib import Path
 import shutil
 import uuid
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 try:
-    from app.database import get_db
+    from app.database import get_db, get_read_db
     from app.models import Disaster, DisasterStatus, CitizenUpdate
+    from app.responses import ORJSONResponse
 except ImportError:
-    from database import get_db
+    from database import get_db, get_read_db
     from models import Disaster, DisasterStatus, CitizenUpdate
+    from responses import ORJSONResponse
 
 
 router = APIRouter(prefix="/public", tags=["public"])
@@ -23,6 +26,10 @@ DEFAULT_UPLOADS_ROOT = (
 UPLOAD_DIR = Path(os.getenv("UPLOADS_DIR", DEFAULT_UPLOADS_ROOT)) / "citizen_updates"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+# Status groups for the public stats counters, built once instead of per request
+ACTIVE_DISASTER_STATUSES = (DisasterStatus.ACTIVE, DisasterStatus.CONTAINED)
+MONITORING_DISASTER_STATUSES = (DisasterStatus.REPORTED, DisasterStatus.VALIDATED)
+
 
 def score_to_severity(score: float) -> str:
     if score >= 8.0:
@@ -35,7 +42,7 @@ def score_to_severity(score: float) -> str:
 
 
 @router.get("/live-board")
-def get_live_board(limit: int = 60, db: Session = Depends(get_db)):
+def get_live_board(limit: int = 60, db: Session = Depends(get_read_db)):
     safe_limit = max(1, min(limit, 200))
 
     rows = (
@@ -68,16 +75,20 @@ def get_live_board(limit: int = 60, db: Session = Depends(get_db)):
         )
 
     active_count = (
-        db.query(Disaster)
-        .filter(Disaster.status.in_([DisasterStatus.ACTIVE, DisasterStatus.CONTAINED]))
-        .count()
+        db.query(func.count(Disaster.id))
+        .filter(Disaster.status.in_(ACTIVE_DISASTER_STATUSES))
+        .scalar()
     )
     monitoring_count = (
-        db.query(Disaster)
-        .filter(Disaster.status.in_([DisasterStatus.REPORTED, DisasterStatus.VALIDATED]))
-        .count()
+        db.query(func.count(Disaster.id))
+        .filter(Disaster.status.in_(MONITORING_DISASTER_STATUSES))
+        .scalar()
+    )
+    resolved_count = (
+        db.query(func.count(Disaster.id))
+        .filter(Disaster.status == DisasterStatus.RESOLVED)
+        .scalar()
     )
-    resolved_count = db.query(Disaster).filter(Disaster.status == DisasterStatus.RESOLVED).count()
     total_affected = sum(item["affected_population"] for item in incidents)
 
     return {
@@ -138,7 +149,7 @@ def create_citizen_update(
 
 
 @router.get("/citizen-updates")
-def list_citizen_updates(limit: int = 50, db: Session = Depends(get_db)):
+def list_citizen_updates(limit: int = 50, db: Session = Depends(get_read_db)):
     safe_limit = max(1, min(limit, 200))
     rows = (
         db.query(CitizenUpdate)
@@ -146,7 +157,9 @@ def list_citizen_updates(limit: int = 50, db: Session = Depends(get_db)):
         .limit(safe_limit)
         .all()
     )
-    return [
+    # Returned directly so orjson formats the datetimes natively (same ISO
+    # text) instead of jsonable_encoder walking every row first
+    return ORJSONResponse([
         {
             "id": row.id,
             "reporter_name": row.reporter_name,
@@ -160,8 +173,8 @@ def list_citizen_updates(limit: int = 50, db: Session = Depends(get_db)):
             "status": row.status,
             "review_note": row.review_note,
             "reviewed_by_user_id": row.reviewed_by_user_id,
-            "reviewed_at": row.reviewed_at.isoformat() if row.reviewed_at else None,
-            "created_at": row.created_at.isoformat(),
+            "reviewed_at": row.reviewed_at,
+            "created_at": row.created_at,
         }
         for row in rows
-    ]
+    ])
@@ -1,25 +1,45 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from app.database import get_db
+from typing import List, Optional
+from app.database import get_async_db, get_db
+from app.request_body import json_body, json_body_openapi, json_list_body, json_list_body_openapi
 from app.schemas import (
     ResourceCreate, ResourceUpdate, ResourceResponse, 
     LocationUpdateRequest, NearbyResource, DispatchRequest,
     DispatchRecommendation, StatusFilter
 )
-from app.models import Resource, ResourceStatus
+from app.models import HAS_GEOMETRY, Resource, ResourceStatus
 from app.services.dispatch import (
-    get_nearby_resources, auto_dispatch, update_resource_location,
-    haversine_distance, estimate_arrival_time
+    get_nearby_resources, auto_dispatch, update_resource_location, update_resource_locations,
+    haversine_distance, estimate_arrival_time, ewkt_point
 )
 
 router = APIRouter(prefix="/resources", tags=["resources"])
 
+# Columns ResourceResponse reads; list queries select just these as plain rows
+# instead of materializing full ORM instances
+RESOURCE_RESPONSE_COLUMNS = (
+    Resource.id,
+    Resource.name,
+    Resource.type,
+    Resource.status,
+    Resource.latitude,
+    Resource.longitude,
+    Resource.speed,
+    Resource.heading,
+    Resource.resource_metadata,
+    Resource.last_updated,
+    Resource.created_at,
+)
+
 
 @router.post("/", response_model=ResourceResponse)
-def create_resource(
+async def create_resource(
     resource: ResourceCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new resource"""
     db_resource = Resource(
@@ -28,52 +48,63 @@ def create_resource(
         latitude=resource.latitude,
         longitude=resource.longitude,
         status=resource.status,
-        resource_metadata=resource.resource_metadata
+        resource_metadata=resource.metadata
     )
+    if HAS_GEOMETRY:
+        db_resource.geom = ewkt_point(resource.latitude, resource.longitude)
     db.add(db_resource)
-    db.commit()
-    db.refresh(db_resource)
+    await db.commit()
     return db_resource
 
 
 @router.get("/{resource_id}", response_model=ResourceResponse)
-def get_resource(
+async def get_resource(
     resource_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get resource by ID"""
-    resource = db.query(Resource).filter(Resource.id == resource_id).first()
+    resource = await db.get(Resource, resource_id)
     if not resource:
         raise HTTPException(status_code=404, detail="Resource not found")
     return resource
 
 
 @router.get("/", response_model=list[ResourceResponse])
-def list_resources(
+async def list_resources(
     status: StatusFilter = Query(StatusFilter.ALL),
     resource_type: str = Query(None),
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=1000),
+    after_id: Optional[int] = Query(None, description="Return resources with id greater than this cursor"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all resources with optional filtering"""
-    query = db.query(Resource)
+    """
+    List resources in id order with optional filtering
+    Keyset-paginated: pass the last id of a page as `after_id` to get the next one
+    """
+    query = lambda_stmt(lambda: select(*RESOURCE_RESPONSE_COLUMNS))
     
     if status != StatusFilter.ALL:
-        query = query.filter(Resource.status == status.value)
+        status_value = status.value
+        query += lambda s: s.where(Resource.status == status_value)
     
     if resource_type:
-        query = query.filter(Resource.type == resource_type)
+        query += lambda s: s.where(Resource.type == resource_type)
+    
+    if after_id is not None:
+        query += lambda s: s.where(Resource.id > after_id)
     
-    return query.all()
+    query += lambda s: s.order_by(Resource.id).limit(limit)
+    return [dict(row) for row in (await db.execute(query)).mappings()]
 
 
 @router.put("/{resource_id}", response_model=ResourceResponse)
-def update_resource(
+async def update_resource(
     resource_id: int,
     resource_update: ResourceUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update resource details"""
-    resource = db.query(Resource).filter(Resource.id == resource_id).first()
+    resource = await db.get(Resource, resource_id)
     if not resource:
         raise HTTPException(status_code=404, detail="Resource not found")
     
@@ -81,16 +112,16 @@ def update_resource(
     for field, value in update_data.items():
         setattr(resource, field, value)
     
+    if HAS_GEOMETRY and ("latitude" in update_data or "longitude" in update_data):
+        resource.geom = ewkt_point(resource.latitude, resource.longitude)
     resource.last_updated = datetime.utcnow()
-    db.add(resource)
-    db.commit()
-    db.refresh(resource)
+    await db.commit()
     return resource
 
 
-@router.post("/update-location")
+@router.post("/update-location", openapi_extra=json_body_openapi(LocationUpdateRequest))
 def update_location(
-    request: LocationUpdateRequest,
+    request: LocationUpdateRequest = Depends(json_body(LocationUpdateRequest)),
     db: Session = Depends(get_db)
 ):
     """Update resource GPS location"""
@@ -112,6 +143,20 @@ def update_location(
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@router.post("/locations/batch", openapi_extra=json_list_body_openapi(LocationUpdateRequest))
+def update_locations_batch(
+    updates: List[LocationUpdateRequest] = Depends(json_list_body(LocationUpdateRequest)),
+    db: Session = Depends(get_db)
+):
+    """Update GPS locations for a burst of fleet telemetry in one statement"""
+    updated, not_found = update_resource_locations(db, updates)
+    return {
+        "status": "success",
+        "updated": updated,
+        "not_found": not_found,
+    }
+
+
 @router.get("/nearby")
 def get_nearby(
     latitude: float = Query(...),
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from app.auth import get_current_user, require_mission_roles
 from app.database import get_db
 from app.models import AlertSubscriber, SMSAlertLog, User
+from app.responses import ORJSONResponse
 from app.services.sms_alerts import dispatch_evacuation_sms
 
 router = APIRouter(prefix="/alerts/sms", tags=["sms-alerts"])
@@ -100,7 +101,9 @@ def list_sms_logs(
     if status:
         query = query.filter(SMSAlertLog.status == status)
     rows = query.order_by(SMSAlertLog.created_at.desc()).limit(max(1, min(limit, 1000))).all()
-    return [
+    # Returned directly so orjson formats the datetimes natively (same ISO
+    # text) instead of jsonable_encoder walking every row first
+    return ORJSONResponse([
         {
             "id": row.id,
             "incident_title": row.incident_title,
@@ -108,8 +111,8 @@ def list_sms_logs(
             "status": row.status,
             "provider": row.provider,
             "error": row.error,
-            "sent_at": row.sent_at.isoformat() if row.sent_at else None,
-            "created_at": row.created_at.isoformat(),
+            "sent_at": row.sent_at,
+            "created_at": row.created_at,
         }
         for row in rows
-    ]
+    ])
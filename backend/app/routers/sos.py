@@ -3,31 +3,86 @@ SOS Endpoints - Citizen emergency reporting and alert broadcasting
 Phase 5: Citizen SOS + Real-Time Alerts
 """
 
-import json
-from typing import List, Optional, Set
+import asyncio
+import math
+import orjson
+from typing import Iterable, List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from anyio import from_thread
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.cache import cache_generation, cache_get, cache_set, get_redis, invalidate_namespace, make_cache_key
+from app.config import settings
+from app.database import SessionLocal, get_db
 from app.models import SOSReport, CrowdAssistance
+from app.request_body import json_body, json_body_openapi
+from app.responses import ORJSONResponse
 from app.auth import require_mission_roles
 from app.schemas import (
-    SOSReportCreate, SOSReportUpdate, SOSReportResponse,
+    SOSReportCreate, SOSReportUpdate, SOSReportResponse, SOSReportListItem,
     CrowdAssistanceOffer, CrowdAssistanceResponse,
     ClusteredSOSLocation, AlertBroadcastRequest, AlertBroadcastResponse,
     SOSAnalytics,
 )
 from app import services
-from app.websockets.manager import ConnectionManager
+from app.services.sos import KM_PER_DEGREE
+from app.websockets.manager import PING_FRAMES, PONG_FRAME, ConnectionManager, encode_message, send_message
 
 router = APIRouter(prefix="/sos", tags=["sos"])
 
+# SOS alert sockets connected to this worker process. With Redis configured,
+# alerts go out over pub/sub so every worker's manager relays them.
+sos_manager = ConnectionManager()
+SOS_ALERT_PUBSUB_CHANNEL = "sos_alerts"
+
+# Cached SOS reads live under this namespace; writes bump its generation
+SOS_CACHE_NAMESPACE = "sos"
+
+# Rows fetched per round trip when a list endpoint streams NDJSON
+SOS_STREAM_BATCH_SIZE = 200
+
+
+def invalidate_sos_cache():
+    """Drop cached SOS reads; called from the sync write handlers' worker threads"""
+    from_thread.run(invalidate_namespace, SOS_CACHE_NAMESPACE)
+
+
+def record_alert_broadcast(**alert):
+    """
+    Background task: record an alert broadcast after the response has gone out.
+    Runs on its own session; the request's session is closed by then.
+    """
+    db = SessionLocal()
+    try:
+        services.sos.broadcast_alert(db=db, **alert)
+    except Exception as e:
+        print(f"Error recording SOS alert broadcast: {e}")
+    finally:
+        db.close()
+
+
+def schedule_sos_alert(background_tasks: BackgroundTasks, sos: SOSReport, **alert):
+    """Queue the alert record and the live WebSocket push for after the response"""
+    background_tasks.add_task(record_alert_broadcast, sos_report_id=sos.id, **alert)
+    background_tasks.add_task(
+        broadcast_sos_alert,
+        alert["alert_type"],
+        sos.id,
+        sos.latitude,
+        sos.longitude,
+        {"message": alert["message"], "broadcast_scope": alert["broadcast_scope"]},
+    )
+
 
 @router.post("/report", response_model=SOSReportResponse)
 def create_sos_report(
     request: SOSReportCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     _mission: str = Depends(require_mission_roles("admin", "field", "analyst")),
 ):
@@ -59,7 +114,7 @@ def create_sos_report(
             reporter_email=request.reporter_email,
             latitude=request.latitude,
             longitude=request.longitude,
-            emergency_type=str(request.emergency_type),
+            emergency_type=request.emergency_type.value,
             description=request.description,
             severity_score=request.severity_score,
             num_people_affected=request.num_people_affected,
@@ -69,20 +124,22 @@ def create_sos_report(
             incident_metadata=request.metadata,
             crowd_assistance_enabled=request.crowd_assistance_enabled,
         )
-        
-        # Broadcast alert about new SOS
-        services.sos.broadcast_alert(
-            db=db,
-            sos_report_id=sos.id,
-            alert_type="new_sos",
-            message=f"New {request.emergency_type} emergency reported near ({request.latitude:.4f}, {request.longitude:.4f}). Severity: {request.severity_score:.1f}/10",
-            broadcast_scope="immediate" if request.severity_score < 5 else "district",
-            broadcaster_type="citizen",
-        )
-        
-        return sos
-    except Exception as e:
+    except (ValueError, IntegrityError) as e:
+        db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+    
+    # Broadcast alert about new SOS once the response is out
+    schedule_sos_alert(
+        background_tasks,
+        sos,
+        alert_type="new_sos",
+        message=f"New {request.emergency_type.value} emergency reported near ({request.latitude:.4f}, {request.longitude:.4f}). Severity: {request.severity_score:.1f}/10",
+        broadcast_scope="immediate" if request.severity_score < 5 else "district",
+        broadcaster_type="citizen",
+    )
+    
+    invalidate_sos_cache()
+    return sos
 
 
 @router.get("/report/{sos_id}", response_model=SOSReportResponse)
@@ -99,17 +156,43 @@ def get_sos_report(
     return sos
 
 
-@router.get("/reports/active", response_model=List[SOSReportResponse])
+def sos_list_response(rows: Iterable) -> ORJSONResponse:
+    """
+    Serialize SOS_LIST_ROW rows directly; they're read from our own tables
+    in the list-item shape, so response_model validation is skipped
+    """
+    return ORJSONResponse([row._asdict() for row in rows])
+
+
+def stream_sos_list(reports: Iterable[SOSReport]) -> StreamingResponse:
+    """NDJSON response written as the rows are fetched, one list item per line"""
+    return StreamingResponse(
+        (SOSReportListItem.model_validate(report).model_dump_json().encode() + b"\n" for report in reports),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/reports/active", response_model=List[SOSReportListItem])
 def get_active_sos_reports(
     limit: int = 50,
+    stream: bool = False,
     db: Session = Depends(get_db),
     _mission: str = Depends(require_mission_roles("admin", "field", "analyst")),
 ):
-    """Get all active SOS reports (pending, acknowledged, in-progress)"""
-    return services.sos.get_all_active_sos(db, limit=limit)
+    """
+    Get all active SOS reports (pending, acknowledged, in-progress)
+    
+    With `stream=true` the reports come back as NDJSON, fetched and written
+    in batches rather than loaded into one list.
+    """
+    if stream:
+        return stream_sos_list(
+            services.sos.get_all_active_sos(db, limit=limit, yield_per=SOS_STREAM_BATCH_SIZE)
+        )
+    return sos_list_response(services.sos.get_all_active_sos(db, limit=limit, as_rows=True))
 
 
-@router.get("/reports/nearby", response_model=List[SOSReportResponse])
+@router.get("/reports/nearby", response_model=List[SOSReportListItem])
 def get_nearby_sos_reports(
     latitude: float,
     longitude: float,
@@ -129,19 +212,24 @@ def get_nearby_sos_reports(
     - `limit`: Maximum results (default: 20)
     """
     nearby = services.sos.find_nearby_sos_reports(
-        db, latitude, longitude, radius_km, status_filter, limit
+        db, latitude, longitude, radius_km, status_filter, limit, as_rows=True
     )
-    return [report for report, _ in nearby]
+    return sos_list_response(report for report, _ in nearby)
 
 
-@router.get("/reports/type/{emergency_type}", response_model=List[SOSReportResponse])
+@router.get("/reports/type/{emergency_type}", response_model=List[SOSReportListItem])
 def get_sos_by_type(
     emergency_type: str,
     active_only: bool = True,
+    stream: bool = False,
     db: Session = Depends(get_db),
     _mission: str = Depends(require_mission_roles("admin", "field", "analyst")),
 ):
-    """Get SOS reports filtered by emergency type"""
+    """Get SOS reports filtered by emergency type (NDJSON with `stream=true`)"""
+    if stream:
+        return stream_sos_list(
+            services.sos.search_sos_by_type(db, emergency_type, active_only, yield_per=SOS_STREAM_BATCH_SIZE)
+        )
     return services.sos.search_sos_by_type(db, emergency_type, active_only)
 
 
@@ -159,12 +247,14 @@ def update_sos_report(
     if not sos:
         raise HTTPException(status_code=404, detail=f"SOS report {sos_id} not found")
     
+    invalidate_sos_cache()
     return sos
 
 
 @router.post("/report/{sos_id}/acknowledge", response_model=SOSReportResponse)
 def acknowledge_sos_report(
     sos_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     _mission: str = Depends(require_mission_roles("admin", "field")),
 ):
@@ -176,22 +266,24 @@ def acknowledge_sos_report(
     if not sos:
         raise HTTPException(status_code=404, detail=f"SOS report {sos_id} not found")
     
-    # Broadcast status update
-    services.sos.broadcast_alert(
-        db=db,
-        sos_report_id=sos_id,
+    # Broadcast status update once the response is out
+    schedule_sos_alert(
+        background_tasks,
+        sos,
         alert_type="status_update",
         message=f"SOS report acknowledged. Emergency response initiated.",
         broadcast_scope="immediate",
         broadcaster_type="emergency_official",
     )
     
+    invalidate_sos_cache()
     return sos
 
 
 @router.post("/report/{sos_id}/resolve", response_model=SOSReportResponse)
 def resolve_sos_report(
     sos_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     _mission: str = Depends(require_mission_roles("admin", "field")),
 ):
@@ -202,22 +294,23 @@ def resolve_sos_report(
     if not sos:
         raise HTTPException(status_code=404, detail=f"SOS report {sos_id} not found")
     
-    # Broadcast resolution
-    services.sos.broadcast_alert(
-        db=db,
-        sos_report_id=sos_id,
+    # Broadcast resolution once the response is out
+    schedule_sos_alert(
+        background_tasks,
+        sos,
         alert_type="resolved",
         message=f"Emergency resolved. Response completed.",
         broadcast_scope="immediate",
         broadcaster_type="emergency_official",
     )
     
+    invalidate_sos_cache()
     return sos
 
 
 @router.get("/reports/clustered", response_model=List[ClusteredSOSLocation])
 def get_clustered_sos_reports(
-    cluster_radius_km: float = 2.0,
+    cluster_radius_km: float = Query(2.0, gt=0),
     db: Session = Depends(get_db),
     _mission: str = Depends(require_mission_roles("admin", "field", "analyst")),
 ):
@@ -246,9 +339,13 @@ def get_clustered_sos_reports(
     ]
 
 
-@router.post("/assistance/offer", response_model=CrowdAssistanceResponse)
+@router.post(
+    "/assistance/offer",
+    response_model=CrowdAssistanceResponse,
+    openapi_extra=json_body_openapi(CrowdAssistanceOffer),
+)
 def offer_assistance(
-    request: CrowdAssistanceOffer,
+    request: CrowdAssistanceOffer = Depends(json_body(CrowdAssistanceOffer)),
     db: Session = Depends(get_db),
     _mission: str = Depends(require_mission_roles("admin", "field", "analyst")),
 ):
@@ -264,20 +361,6 @@ def offer_assistance(
     - `description`: Details about the help they can provide
     """
     try:
-        # Check if SOS exists and allows crowd assistance
-        sos = services.sos.get_sos_report(db, request.sos_report_id)
-        if not sos:
-            raise HTTPException(
-                status_code=404,
-                detail=f"SOS report {request.sos_report_id} not found"
-            )
-        
-        if not sos.crowd_assistance_enabled:
-            raise HTTPException(
-                status_code=400,
-                detail="Crowd assistance is disabled for this SOS"
-            )
-        
         assistance = services.sos.offer_crowd_assistance(
             db=db,
             sos_report_id=request.sos_report_id,
@@ -288,10 +371,24 @@ def offer_assistance(
             assistance_type=request.assistance_type,
             description=request.description,
         )
-        
-        return assistance
-    except Exception as e:
+    except (ValueError, IntegrityError) as e:
+        db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+    
+    if assistance is None:
+        # Nothing was inserted; only now look up why
+        if not services.sos.get_sos_report(db, request.sos_report_id):
+            raise HTTPException(
+                status_code=404,
+                detail=f"SOS report {request.sos_report_id} not found"
+            )
+        raise HTTPException(
+            status_code=400,
+            detail="Crowd assistance is disabled for this SOS"
+        )
+    
+    invalidate_sos_cache()
+    return assistance
 
 
 @router.get("/assistance/offers/{sos_id}", response_model=List[CrowdAssistanceResponse])
@@ -317,6 +414,7 @@ def accept_assistance(
     if not assistance:
         raise HTTPException(status_code=404, detail=f"Assistance offer {assistance_id} not found")
     
+    invalidate_sos_cache()
     return assistance
 
 
@@ -344,14 +442,15 @@ def broadcast_alert(
             broadcast_scope=request.broadcast_scope,
             broadcaster_type="emergency_official",
         )
-        
-        return broadcast
-    except Exception as e:
+    except (ValueError, IntegrityError) as e:
+        db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+    
+    return broadcast
 
 
 @router.get("/analytics", response_model=SOSAnalytics)
-def get_sos_analytics(
+async def get_sos_analytics(
     db: Session = Depends(get_db),
     _mission: str = Depends(require_mission_roles("admin", "field", "analyst")),
 ):
@@ -366,8 +465,22 @@ def get_sos_analytics(
     - `urgent_cases`: Life-threatening cases currently active
     - `crowd_assistance_available`: Volunteers available to help
     - `nearby_resources_count`: Emergency resources near active SOS
+    
+    Cached for a few seconds so dashboard polling doesn't rescan the tables;
+    any SOS or crowd-assistance write drops the cached copy.
     """
-    return services.sos.get_sos_analytics(db)
+    generation = await cache_generation(SOS_CACHE_NAMESPACE)
+    key = make_cache_key(f"{SOS_CACHE_NAMESPACE}:{generation}:analytics", {})
+    cached = await cache_get(key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
+    analytics = SOSAnalytics.model_validate(
+        await run_in_threadpool(services.sos.get_sos_analytics, db)
+    )
+    body = analytics.model_dump_json()
+    await cache_set(key, body, settings.sos_analytics_cache_ttl_seconds)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/nearby-resources/{sos_id}")
@@ -384,25 +497,21 @@ def get_resources_for_sos(
     - `sos_id`: SOS report ID
     - `radius_km`: Search radius (default: 10 km)
     """
-    sos = services.sos.get_sos_report(db, sos_id)
-    if not sos:
+    resources = services.sos.find_resources_near_sos(db, sos_id, radius_km)
+    if resources is None:
         raise HTTPException(status_code=404, detail=f"SOS report {sos_id} not found")
     
-    resources = services.sos.find_nearby_resources(
-        db, sos.latitude, sos.longitude, radius_km
-    )
-    
     return [
         {
             "id": resource.id,
             "name": resource.name,
             "type": resource.type,
-            "distance_km": round(distance, 2),
+            "distance_km": round(resource.distance_km, 2),
             "latitude": resource.latitude,
             "longitude": resource.longitude,
             "status": resource.status,
         }
-        for resource, distance in resources
+        for resource in resources
     ]
 
 
@@ -414,12 +523,44 @@ def health_check():
 
 
 # WebSocket endpoint for real-time SOS alerts
-from fastapi import WebSocket, WebSocketDisconnect
-from app.websockets.manager import ConnectionManager
-from typing import Set
 
-# Global SOS alert connection manager
-sos_manager = ConnectionManager()
+# Location subscriptions are registered on a fixed lat/lon tile grid rather
+# than on their raw coordinates, so an alert only has to be published to the
+# single tile its SOS falls in
+LOCATION_TILE_DEGREES = 0.05  # ~5.5 km north-south
+LOCATION_TILE_COLUMNS = round(360 / LOCATION_TILE_DEGREES)
+
+# Every subscribed tile is a channel key, so bound what one message can add
+MAX_SUBSCRIPTION_RADIUS_KM = 50.0
+MAX_SUBSCRIPTION_TILES = 4096
+
+
+def location_tile(latitude: float, longitude: float) -> str:
+    """Channel for the grid tile containing a point"""
+    row = math.floor(latitude / LOCATION_TILE_DEGREES)
+    col = math.floor(longitude / LOCATION_TILE_DEGREES) % LOCATION_TILE_COLUMNS
+    return f"tile:{row}:{col}"
+
+
+def location_tiles(latitude: float, longitude: float, radius_km: float) -> List[str]:
+    """
+    Channels for every grid tile the radius around a point overlaps.
+    Raises ValueError if that is more than MAX_SUBSCRIPTION_TILES tiles.
+    """
+    lat_span = radius_km / KM_PER_DEGREE
+    lon_span = lat_span / max(math.cos(math.radians(latitude)), 0.01)
+    rows = range(
+        math.floor((latitude - lat_span) / LOCATION_TILE_DEGREES),
+        math.floor((latitude + lat_span) / LOCATION_TILE_DEGREES) + 1,
+    )
+    col_range = range(
+        math.floor((longitude - lon_span) / LOCATION_TILE_DEGREES),
+        math.floor((longitude + lon_span) / LOCATION_TILE_DEGREES) + 1,
+    )
+    if len(rows) * min(len(col_range), LOCATION_TILE_COLUMNS) > MAX_SUBSCRIPTION_TILES:
+        raise ValueError("Subscription area covers too many tiles; use a smaller radius")
+    cols = {col % LOCATION_TILE_COLUMNS for col in col_range}
+    return [f"tile:{row}:{col}" for row in rows for col in sorted(cols)]
 
 
 @router.websocket("/ws")
@@ -454,7 +595,7 @@ async def websocket_sos_endpoint(websocket: WebSocket):
     ```json
     {
       "type": "unsubscribe",
-      "channel": "location:28.7041:77.1025:5.0"
+      "channel": "location:tile:574:1542:50"
     }
     ```
     
@@ -466,25 +607,41 @@ async def websocket_sos_endpoint(websocket: WebSocket):
     - `sos_resolved`: Emergency resolved
     """
     await sos_manager.connect(websocket)
-    client_subscriptions: Set[str] = set()
     
     try:
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            if data in PING_FRAMES:
+                await websocket.send_text(PONG_FRAME)
+                continue
+            
+            message = orjson.loads(data)
             message_type = message.get("type")
             
             if message_type == "subscribe_location":
                 # Subscribe to location-based alerts
                 lat = message.get("latitude")
                 lon = message.get("longitude")
-                radius = message.get("radius_km", 5.0)
-                channel = f"location:{lat}:{lon}:{radius}"
+                try:
+                    if not (-90 <= float(lat) <= 90 and -180 <= float(lon) <= 180):
+                        raise ValueError("Invalid geographic coordinates")
+                    radius = min(max(float(message.get("radius_km", 5.0)), 0.0), MAX_SUBSCRIPTION_RADIUS_KM)
+                    # Quantize to 0.1 km so equal radii spelled differently
+                    # ("5" vs "5.0", float noise) name the same subscription
+                    radius_tenths = int(round(radius * 10))
+                    radius = radius_tenths / 10
+                    tiles = location_tiles(float(lat), float(lon), radius)
+                except (TypeError, ValueError, OverflowError) as e:
+                    await send_message(websocket, {
+                        "type": "subscription_error",
+                        "detail": str(e)
+                    })
+                    continue
+                channel = f"location:{location_tile(float(lat), float(lon))}:{radius_tenths}"
                 
-                await sos_manager.subscribe(websocket, channel)
-                client_subscriptions.add(channel)
+                await sos_manager.subscribe(websocket, channel, tiles)
                 
-                await websocket.send_json({
+                await send_message(websocket, {
                     "type": "subscription_confirmed",
                     "channel": channel,
                     "latitude": lat,
@@ -498,9 +655,8 @@ async def websocket_sos_endpoint(websocket: WebSocket):
                 channel = f"sos:{sos_id}"
                 
                 await sos_manager.subscribe(websocket, channel)
-                client_subscriptions.add(channel)
                 
-                await websocket.send_json({
+                await send_message(websocket, {
                     "type": "subscription_confirmed",
                     "channel": channel,
                     "sos_id": sos_id
@@ -511,17 +667,15 @@ async def websocket_sos_endpoint(websocket: WebSocket):
                 channel = message.get("channel")
                 
                 await sos_manager.unsubscribe(websocket, channel)
-                if channel in client_subscriptions:
-                    client_subscriptions.remove(channel)
                 
-                await websocket.send_json({
+                await send_message(websocket, {
                     "type": "unsubscription_confirmed",
                     "channel": channel
                 })
             
             elif message_type == "ping":
                 # Keep-alive ping
-                await websocket.send_json({"type": "pong"})
+                await websocket.send_text(PONG_FRAME)
     
     except WebSocketDisconnect:
         await sos_manager.disconnect(websocket)
@@ -536,7 +690,6 @@ async def broadcast_sos_alert(
     sos_id: int,
     latitude: float,
     longitude: float,
-    radius_km: float = 5.0,
     data: dict = None
 ):
     """
@@ -554,10 +707,39 @@ async def broadcast_sos_alert(
         **(data or {})
     }
     
-    # Broadcast to location-based subscribers
-    location_channel = f"location:{latitude}:{longitude}:{radius_km}"
-    await sos_manager.broadcast_to_resource(location_channel, message)
+    # Location subscribers whose radius overlaps the SOS tile, plus the
+    # SOS-specific subscribers; a client on both gets it once
+    channels = [location_tile(latitude, longitude), f"sos:{sos_id}"]
+    payload = encode_message(message)
     
-    # Broadcast to specific SOS subscribers
-    sos_channel = f"sos:{sos_id}"
-    await sos_manager.broadcast_to_resource(sos_channel, message)
+    redis = get_redis()
+    if redis is not None:
+        envelope = orjson.dumps({"channels": channels, "message": payload}).decode()
+        await redis.publish(SOS_ALERT_PUBSUB_CHANNEL, envelope)
+    else:
+        await sos_manager.broadcast_to_channels(channels, payload)
+
+
+async def relay_sos_alerts(redis):
+    """Deliver alerts published by any worker to this worker's subscribers"""
+    pubsub = redis.pubsub()
+    await pubsub.subscribe(SOS_ALERT_PUBSUB_CHANNEL)
+    try:
+        async for item in pubsub.listen():
+            if item["type"] != "message":
+                continue
+            try:
+                envelope = orjson.loads(item["data"])
+                await sos_manager.broadcast_to_channels(envelope["channels"], envelope["message"])
+            except Exception as e:
+                print(f"SOS alert relay error: {e}")
+    finally:
+        await pubsub.aclose()
+
+
+def start_sos_alert_relay() -> Optional[asyncio.Task]:
+    """Start this worker's pub/sub relay; None when Redis isn't configured"""
+    redis = get_redis()
+    if redis is None:
+        return None
+    return asyncio.create_task(relay_sos_alerts(redis))
@@ -1,9 +1,19 @@
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
 from datetime import datetime
 from typing import Optional, Dict, Any
 from enum import Enum
 
 
+class DeferredModel(BaseModel):
+    """
+    Base for response schemas off the hot path: the core schema is built on
+    first use instead of at import, which keeps startup cheap. Request bodies
+    stay on BaseModel; FastAPI wraps those in an aliased field, which doesn't
+    rebuild cleanly from a deferred model.
+    """
+    model_config = ConfigDict(defer_build=True)
+
+
 class DisasterType(str, Enum):
     EARTHQUAKE = "earthquake"
     FLOOD = "flood"
@@ -80,7 +90,10 @@ class DisasterResponse(BaseModel):
     num_casualties: int
     description: str
     source: str
-    metadata: Optional[Dict[str, Any]]
+    # ORM rows keep this in `extra_metadata`; `metadata` is reserved by SQLAlchemy
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, validation_alias=AliasChoices("extra_metadata", "metadata")
+    )
     reported_at: datetime
     validated_at: Optional[datetime]
     resolved_at: Optional[datetime]
@@ -164,7 +177,9 @@ class ResourceResponse(BaseModel):
     longitude: float
     speed: float
     heading: float
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, validation_alias=AliasChoices("resource_metadata", "metadata")
+    )
     last_updated: datetime
     created_at: datetime
     
@@ -223,7 +238,7 @@ class DispatchRecommendation(BaseModel):
         }
 
 
-class DispatchRecord(BaseModel):
+class DispatchRecord(DeferredModel):
     """Response with dispatch record"""
     id: int
     resource_id: int
@@ -323,8 +338,8 @@ class SOSReportUpdate(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 
-class SOSReportResponse(BaseModel):
-    """Response with SOS report details"""
+class SOSReportListItem(BaseModel):
+    """SOS report as shown in list views; the incident metadata isn't loaded"""
     id: int
     reporter_name: str
     reporter_phone: str
@@ -341,7 +356,6 @@ class SOSReportResponse(BaseModel):
     is_urgent: bool
     nearest_resource_id: Optional[int] = None
     distance_to_nearest_resource_km: Optional[float] = None
-    metadata: Optional[Dict[str, Any]] = None
     crowd_assistance_enabled: bool
     reported_at: datetime
     acknowledged_at: Optional[datetime] = None
@@ -351,6 +365,11 @@ class SOSReportResponse(BaseModel):
         from_attributes = True
 
 
+class SOSReportResponse(SOSReportListItem):
+    """Response with SOS report details"""
+    metadata: Optional[Dict[str, Any]] = None
+
+
 class CrowdAssistanceOffer(BaseModel):
     """Request to offer assistance for SOS"""
     sos_report_id: int
@@ -397,7 +416,7 @@ class CrowdAssistanceResponse(BaseModel):
         from_attributes = True
 
 
-class ClusteredSOSLocation(BaseModel):
+class ClusteredSOSLocation(DeferredModel):
     """Clustered SOS reports by location"""
     cluster_id: str
     center_latitude: float
@@ -427,7 +446,7 @@ class AlertBroadcastRequest(BaseModel):
         }
 
 
-class AlertBroadcastResponse(BaseModel):
+class AlertBroadcastResponse(DeferredModel):
     """Response with alert broadcast details"""
     id: int
     sos_report_id: int
@@ -444,7 +463,7 @@ class AlertBroadcastResponse(BaseModel):
         from_attributes = True
 
 
-class SOSAnalytics(BaseModel):
+class SOSAnalytics(DeferredModel):
     """Analytics for SOS reports"""
     total_active_sos: int
     total_resolved_today: int
@@ -469,7 +488,7 @@ class ShelterCreate(BaseModel):
     contact_phone: Optional[str] = None
     contact_email: Optional[str] = None
 
-class ShelterResponse(BaseModel):
+class ShelterResponse(DeferredModel):
     """Shelter response"""
     id: int
     name: str
@@ -505,7 +524,7 @@ class HospitalCreate(BaseModel):
     contact_phone: Optional[str] = None
     contact_email: Optional[str] = None
 
-class HospitalResponse(BaseModel):
+class HospitalResponse(DeferredModel):
     """Hospital response"""
     id: int
     name: str
@@ -541,7 +560,7 @@ class EvacuationRouteCreate(BaseModel):
     end_point_lat: float = Field(..., ge=-90, le=90)
     end_point_lon: float = Field(..., ge=-180, le=180)
 
-class EvacuationRouteResponse(BaseModel):
+class EvacuationRouteResponse(DeferredModel):
     """Evacuation route response"""
     id: int
     name: str
@@ -577,7 +596,7 @@ class DisasterZoneCreate(BaseModel):
     nearest_shelters: Optional[list[int]] = None
     emergency_contacts: Optional[Dict[str, Any]] = None
 
-class DisasterZoneResponse(BaseModel):
+class DisasterZoneResponse(DeferredModel):
     """Disaster zone response"""
     id: int
     name: str
@@ -613,7 +632,7 @@ class OperationalLogCreate(BaseModel):
     source: str = "system"
     ip_address: Optional[str] = None
 
-class OperationalLogResponse(BaseModel):
+class OperationalLogResponse(DeferredModel):
     """Operational log response"""
     id: int
     timestamp: datetime
@@ -668,7 +687,7 @@ class AuditEventCreate(BaseModel):
     event_metadata: Optional[Dict[str, Any]] = None
 
 
-class AuditEventResponse(BaseModel):
+class AuditEventResponse(DeferredModel):
     id: int
     actor_name: str
     actor_user_id: Optional[int] = None
@@ -2,8 +2,13 @@ from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+try:
+    from app.schemas import DeferredModel
+except ImportError:
+    from schemas import DeferredModel
 
-class ChatMessage(BaseModel):
+
+class ChatMessage(DeferredModel):
     """Single chat message"""
     role: str  # "user" or "assistant"
     content: str
@@ -29,7 +34,7 @@ class ChatRequest(BaseModel):
         }
 
 
-class ChatResponse(BaseModel):
+class ChatResponse(DeferredModel):
     """Response from chat"""
     message: str
     conversation_id: str
@@ -67,7 +72,7 @@ class DisasterExplanationRequest(BaseModel):
         }
 
 
-class DisasterExplanationResponse(BaseModel):
+class DisasterExplanationResponse(DeferredModel):
     """Response with disaster explanation"""
     explanation: str
     disaster_type: str
@@ -106,7 +111,7 @@ class ResourcePriorityRequest(BaseModel):
         }
 
 
-class ResourcePriority(BaseModel):
+class ResourcePriority(DeferredModel):
     """Single resource priority recommendation"""
     rank: int
     resource_name: str
@@ -116,7 +121,7 @@ class ResourcePriority(BaseModel):
     primary_role: str
 
 
-class ResourcePriorityResponse(BaseModel):
+class ResourcePriorityResponse(DeferredModel):
     """Response with resource prioritization"""
     priorities: List[ResourcePriority]
     situation_assessment: str
@@ -141,7 +146,7 @@ class SafetyInstructionsRequest(BaseModel):
         }
 
 
-class SafetyInstructionsResponse(BaseModel):
+class SafetyInstructionsResponse(DeferredModel):
     """Response with safety instructions"""
     disaster_type: str
     immediate_actions: List[str]
@@ -175,7 +180,7 @@ class SituationAnalysisRequest(BaseModel):
         }
 
 
-class SituationAnalysisResponse(BaseModel):
+class SituationAnalysisResponse(DeferredModel):
     """Response with comprehensive situation analysis"""
     situation_summary: str
     severity_level: str
@@ -186,13 +191,13 @@ class SituationAnalysisResponse(BaseModel):
     forecast: Optional[str] = None
 
 
-class ConversationHistoryRequest(BaseModel):
+class ConversationHistoryRequest(DeferredModel):
     """Request to get conversation history"""
     conversation_id: str
     limit: int = 10
 
 
-class ConversationHistoryResponse(BaseModel):
+class ConversationHistoryResponse(DeferredModel):
     """Response with conversation history"""
     conversation_id: str
     messages: List[ChatMessage]
@@ -200,10 +205,10 @@ class ConversationHistoryResponse(BaseModel):
     last_updated: Optional[datetime] = None
 
 
-class DecisionSummary(BaseModel):
+class DecisionSummary(DeferredModel):
     """Summary of AI decision"""
     recommendation: str
-    confidence: float = Field(..., ge=0, le=1)
+    confidence: float  # 0-1; computed and clamped server-side
     key_factors: List[str]
     alternative_actions: List[str]
     risks: List[str]
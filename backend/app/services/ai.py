@@ -1,16 +1,49 @@
-from typing import Optional, Dict, List
+from typing import TYPE_CHECKING, AsyncIterator, Deque, Optional, Dict, List
+from bisect import bisect_right
+from collections import deque
 from datetime import datetime
+from functools import lru_cache
+import orjson
+from app.cache import cache_get, cache_set, make_cache_key
 from app.config import settings
-import openai
 
-# Initialize OpenAI client
-client = openai.OpenAI(api_key=settings.openai_api_key)
+if TYPE_CHECKING:
+    import openai
+
+
+@lru_cache(maxsize=1)
+def get_client() -> "openai.AsyncOpenAI":
+    """
+    Shared OpenAI client (async so concurrent requests don't block the event loop).
+    Built on first use: importing the SDK is a large share of app startup.
+    """
+    import httpx
+    import openai
+    # Keep-alive pool sized for many concurrent completions on one worker
+    http_client = openai.DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+        )
+    )
+    return openai.AsyncOpenAI(api_key=settings.openai_api_key, http_client=http_client)
+
+
+# Distinct argument sets remembered per cached prompt template
+PROMPT_CACHE_SIZE = 512
 
 
 class PromptTemplate:
-    """Template for AI prompts with variable substitution"""
+    """
+    Template for AI prompts with variable substitution
+    
+    Templates whose arguments repeat (disaster type, location, flags) are
+    memoized; resource_priority takes a list of dicts and situation_analysis
+    live figures, so those are formatted every time.
+    """
     
     @staticmethod
+    @lru_cache(maxsize=PROMPT_CACHE_SIZE)
     def disaster_explanation(
         disaster_type: str,
         latitude: float,
@@ -75,6 +108,7 @@ Be tactical and specific."""
         return prompt
     
     @staticmethod
+    @lru_cache(maxsize=PROMPT_CACHE_SIZE)
     def safety_instructions(
         disaster_type: str,
         location_type: str = "urban",
@@ -132,31 +166,20 @@ Be tactical and specific."""
         return prompt
 
 
+# Lower bounds of each severity band above the lowest, and the labels per band
+SEVERITY_BAND_EDGES = (25, 50, 75, 90)
+SEVERITY_LEVELS = ("MINIMAL", "MINOR", "MODERATE", "SEVERE", "CRITICAL")
+OPERATIONAL_SEVERITY_LABELS = ("LOW", "GUARDED", "ELEVATED", "HIGH", "CRITICAL")
+
+
 def get_severity_description(score: float) -> str:
     """Convert severity score to descriptive level"""
-    if score >= 90:
-        return "CRITICAL"
-    elif score >= 75:
-        return "SEVERE"
-    elif score >= 50:
-        return "MODERATE"
-    elif score >= 25:
-        return "MINOR"
-    else:
-        return "MINIMAL"
+    return SEVERITY_LEVELS[bisect_right(SEVERITY_BAND_EDGES, score)]
 
 
 def get_operational_severity_label(score: float) -> str:
     """Operational wording used in natural-language prompts."""
-    if score >= 90:
-        return "CRITICAL"
-    if score >= 75:
-        return "HIGH"
-    if score >= 50:
-        return "ELEVATED"
-    if score >= 25:
-        return "GUARDED"
-    return "LOW"
+    return OPERATIONAL_SEVERITY_LABELS[bisect_right(SEVERITY_BAND_EDGES, score)]
 
 
 async def generate_ai_response(
@@ -186,25 +209,104 @@ async def generate_ai_response(
     temperature = temperature if temperature is not None else settings.openai_temperature
     max_tokens = max_tokens or settings.openai_max_tokens
     
-    try:
-        response = client.chat.completions.create(
-            model=settings.openai_model,
-            messages=[
-                {"role": "system", "content": system_role},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=temperature,
-            max_tokens=max_tokens,
-            stream=stream
-        )
-        
-        if stream:
-            return response
-        
-        return response.choices[0].message.content
+    response = await get_client().chat.completions.create(
+        model=settings.openai_model,
+        messages=[
+            {"role": "system", "content": system_role},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=stream
+    )
+    
+    if stream:
+        return response
+    
+    return response.choices[0].message.content
+
+
+async def stream_ai_response(
+    prompt: str,
+    system_role: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None
+) -> AsyncIterator[str]:
+    """
+    Stream response tokens from OpenAI API as they arrive
+    
+    Args:
+        prompt: The user/system prompt
+        system_role: Custom system role (overrides config default)
+        temperature: Creativity level (0-2)
+        max_tokens: Maximum response length
+    
+    Yields:
+        Content deltas of the response, in order
+    """
+    if not settings.openai_api_key:
+        raise ValueError("OPENAI_API_KEY not configured")
+    
+    system_role = system_role or settings.ai_system_prompt
+    temperature = temperature if temperature is not None else settings.openai_temperature
+    max_tokens = max_tokens or settings.openai_max_tokens
+    
+    stream = await get_client().chat.completions.create(
+        model=settings.openai_model,
+        messages=[
+            {"role": "system", "content": system_role},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True
+    )
+    
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+async def cached_ai_response(
+    namespace: str,
+    prompt: str,
+    system_role: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None
+) -> str:
+    """
+    Return a cached response for identical completion inputs, calling OpenAI on a miss
+    
+    The key hashes everything sent to the model, so changing the model,
+    system prompt or a prompt template never serves a stale completion
+    
+    Args:
+        namespace: Cache namespace for the kind of request
+        prompt: The prompt to send on a cache miss
+        system_role: Custom system role (overrides config default)
+        temperature: Creativity level (0-2)
+        max_tokens: Maximum response length
+    """
+    system_role = system_role or settings.ai_system_prompt
+    temperature = temperature if temperature is not None else settings.openai_temperature
+    max_tokens = max_tokens or settings.openai_max_tokens
+    
+    key = make_cache_key(
+        f"ai:resp:{namespace}",
+        [settings.openai_model, system_role, prompt, temperature, max_tokens],
+    )
+    cached = await cache_get(key)
+    if cached is not None:
+        return cached
     
-    except openai.APIError as e:
-        raise Exception(f"OpenAI API error: {str(e)}")
+    response_text = await generate_ai_response(
+        prompt, system_role=system_role, temperature=temperature, max_tokens=max_tokens
+    )
+    await cache_set(key, response_text, settings.ai_response_cache_ttl_seconds)
+    return response_text
 
 
 async def explain_disaster(
@@ -218,7 +320,7 @@ async def explain_disaster(
     prompt = PromptTemplate.disaster_explanation(
         disaster_type, latitude, longitude, severity_score, context
     )
-    return await generate_ai_response(prompt)
+    return await cached_ai_response("explain", prompt)
 
 
 async def prioritize_resources(
@@ -231,7 +333,7 @@ async def prioritize_resources(
     prompt = PromptTemplate.resource_priority(
         disaster_type, severity_score, available_resources, current_situation
     )
-    return await generate_ai_response(prompt)
+    return await cached_ai_response("priority", prompt)
 
 
 async def generate_safety_instructions(
@@ -245,7 +347,7 @@ async def generate_safety_instructions(
     )
     
     # Use lower temperature for precise instructions
-    return await generate_ai_response(prompt, temperature=0.3)
+    return await cached_ai_response("safety", prompt, temperature=0.3)
 
 
 async def analyze_situation(
@@ -267,33 +369,51 @@ async def analyze_situation(
 class ConversationManager:
     """Manage multi-turn conversation history"""
     
+    __slots__ = ("messages", "max_history")
+    
     def __init__(self, max_history: int = 10):
-        self.messages: List[Dict[str, str]] = []
+        # Bounded deque: appending past max_history drops the oldest turn in O(1)
+        self.messages: Deque[Dict[str, str]] = deque(maxlen=max_history)
         self.max_history = max_history
     
     def add_user_message(self, content: str):
         """Add user message to history"""
         self.messages.append({"role": "user", "content": content})
-        self._trim_history()
     
     def add_assistant_message(self, content: str):
         """Add assistant message to history"""
         self.messages.append({"role": "assistant", "content": content})
-        self._trim_history()
     
     def get_messages(self) -> List[Dict[str, str]]:
         """Get current message history"""
-        return self.messages.copy()
+        return list(self.messages)
     
-    def _trim_history(self):
-        """Keep only recent messages"""
-        if len(self.messages) > self.max_history:
-            # Keep system message + recent messages
-            self.messages = self.messages[-(self.max_history - 1):]
+    def recent_messages(self, limit: int) -> List[Dict[str, str]]:
+        """Get the last `limit` messages"""
+        return list(self.messages)[-limit:]
     
     def clear(self):
         """Clear conversation history"""
-        self.messages = []
+        self.messages.clear()
+    
+    @staticmethod
+    def storage_key(conversation_id: str) -> str:
+        """Redis key holding a conversation's message history"""
+        return f"conv:{conversation_id}"
+    
+    @classmethod
+    async def load(cls, redis, conversation_id: str) -> Optional["ConversationManager"]:
+        """Load a conversation from Redis, or None if it expired or never existed"""
+        raw = await redis.get(cls.storage_key(conversation_id))
+        if raw is None:
+            return None
+        manager = cls()
+        manager.messages.extend(orjson.loads(raw))
+        return manager
+    
+    async def save(self, redis, conversation_id: str, ttl_seconds: int):
+        """Persist the message history to Redis, refreshing its TTL"""
+        await redis.setex(self.storage_key(conversation_id), ttl_seconds, orjson.dumps(list(self.messages)))
     
     async def get_response(
         self,
@@ -305,21 +425,50 @@ class ConversationManager:
         
         system_role = system_role or settings.ai_system_prompt
         
-        try:
-            response = client.chat.completions.create(
-                model=settings.openai_model,
-                messages=[
-                    {"role": "system", "content": system_role},
-                    *self.messages
-                ],
-                temperature=settings.openai_temperature,
-                max_tokens=settings.openai_max_tokens
-            )
-            
-            assistant_message = response.choices[0].message.content
-            self.add_assistant_message(assistant_message)
-            
-            return assistant_message
+        response = await get_client().chat.completions.create(
+            model=settings.openai_model,
+            messages=[
+                {"role": "system", "content": system_role},
+                *self.messages
+            ],
+            temperature=settings.openai_temperature,
+            max_tokens=settings.openai_max_tokens
+        )
+        
+        assistant_message = response.choices[0].message.content
+        self.add_assistant_message(assistant_message)
+        
+        return assistant_message
+    
+    async def stream_response(
+        self,
+        user_message: str,
+        system_role: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream response tokens in context of conversation as they arrive"""
+        self.add_user_message(user_message)
+        
+        system_role = system_role or settings.ai_system_prompt
+        
+        stream = await get_client().chat.completions.create(
+            model=settings.openai_model,
+            messages=[
+                {"role": "system", "content": system_role},
+                *self.messages
+            ],
+            temperature=settings.openai_temperature,
+            max_tokens=settings.openai_max_tokens,
+            stream=True
+        )
+        
+        parts: List[str] = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
         
-        except openai.APIError as e:
-            raise Exception(f"OpenAI API error: {str(e)}")
+        # Only record the reply once it has been fully received
+        self.add_assistant_message("".join(parts))
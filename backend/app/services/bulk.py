@@ -0,0 +1,20 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+
+def bulk_insert(db: Session, model, rows: List[Dict[str, Any]], commit: bool = True) -> int:
+    """
+    Insert many rows of `model` in one executemany INSERT.
+
+    SQLAlchemy batches the parameter sets into multi-row INSERT statements
+    (insertmanyvalues), avoiding the per-object unit-of-work cost of
+    session.add(). Column defaults still apply; returns the number of rows.
+    """
+    if not rows:
+        return 0
+    db.execute(insert(model), rows)
+    if commit:
+        db.commit()
+    return len(rows)
@@ -3,12 +3,61 @@ Disaster Validation Service
 Validates incoming disaster reports and assesses their credibility.
 """
 
+from bisect import bisect_right
+
 try:
     from app.schemas import DisasterValidationRequest, DisasterValidationResponse
 except ImportError:
     from schemas import DisasterValidationRequest, DisasterValidationResponse
 
 
+# Lookup tables built once at import instead of per request
+HIGH_CREDIBILITY_SOURCES = frozenset({"usgs", "official", "government", "emergency_service"})
+MEDIUM_CREDIBILITY_SOURCES = frozenset({"news", "media", "citizen_report", "social_media"})
+
+# Severity consistency bands: [0, 4), [4, 7), [7, 10] -> (score, bonus, reason)
+SEVERITY_CONSISTENCY_EDGES = (4, 7)
+SEVERITY_CONSISTENCY_BANDS = (
+    (60, 5, "Low severity score"),
+    (75, 10, "Medium severity score"),
+    (90, 15, "High severity score is critical"),
+)
+
+# Severity levels: below 4, 4-6, 6-8, 8 and above
+SEVERITY_LEVEL_EDGES = (4, 6, 8)
+SEVERITY_LEVELS = ("Low", "Medium", "High", "Critical")
+
+_VALID_SEVERITY_ACTIONS = {
+    "Critical": (
+        "🚨 Deploy maximum available resources immediately",
+        "📢 Issue public alert and evacuation orders",
+        "📱 Activate emergency communication systems",
+    ),
+    "High": (
+        "⚠️ Deploy adequate resources to affected area",
+        "📊 Monitor situation closely for escalation",
+    ),
+    "Medium": ("👁️ Monitor situation and prepare resources",),
+    "Low": ("👁️ Monitor situation and prepare resources",),
+}
+VALID_RECOMMENDED_ACTIONS = {
+    level: (
+        "✅ Disaster report is VALID - activate response protocols",
+        *actions,
+        "🗺️ Establish command center at strategic location",
+        "🚑 Activate medical and rescue teams",
+        "📋 Begin damage assessment",
+    )
+    for level, actions in _VALID_SEVERITY_ACTIONS.items()
+}
+INVALID_RECOMMENDED_ACTIONS = (
+    "❌ Disaster report requires additional verification",
+    "🔍 Collect more credible evidence",
+    "📞 Contact source for confirmation",
+    "⏳ Monitor for corroborating reports",
+)
+
+
 def validate_disaster(request: DisasterValidationRequest) -> DisasterValidationResponse:
     """
     Validate a disaster report by checking multiple factors.
@@ -27,11 +76,11 @@ def validate_disaster(request: DisasterValidationRequest) -> DisasterValidationR
     
     # 1. Source Credibility Check
     source_lower = request.source.lower()
-    if source_lower in ["usgs", "official", "government", "emergency_service"]:
+    if source_lower in HIGH_CREDIBILITY_SOURCES:
         validation_details["source_credibility"] = 95
         validation_score += 20
         reasons.append("High credibility source (official)")
-    elif source_lower in ["news", "media", "citizen_report", "social_media"]:
+    elif source_lower in MEDIUM_CREDIBILITY_SOURCES:
         validation_details["source_credibility"] = 60
         validation_score += 5
         reasons.append("Medium credibility source (citizen/media)")
@@ -42,18 +91,10 @@ def validate_disaster(request: DisasterValidationRequest) -> DisasterValidationR
     # 2. Severity Consistency Check
     severity = request.severity_score
     if 0 <= severity <= 10:
-        if 7 <= severity <= 10:
-            validation_details["severity_consistency"] = 90
-            validation_score += 15
-            reasons.append("High severity score is critical")
-        elif 4 <= severity < 7:
-            validation_details["severity_consistency"] = 75
-            validation_score += 10
-            reasons.append("Medium severity score")
-        else:
-            validation_details["severity_consistency"] = 60
-            validation_score += 5
-            reasons.append("Low severity score")
+        consistency, bonus, reason = SEVERITY_CONSISTENCY_BANDS[bisect_right(SEVERITY_CONSISTENCY_EDGES, severity)]
+        validation_details["severity_consistency"] = consistency
+        validation_score += bonus
+        reasons.append(reason)
     
     # 3. Location Validity Check
     lat = request.latitude
@@ -95,38 +136,13 @@ def validate_disaster(request: DisasterValidationRequest) -> DisasterValidationR
     # Determine validity threshold and severity level
     is_valid = validation_score >= 40  # Disasters with score >= 40 are considered valid
     
-    if severity >= 8:
-        severity_level = "Critical"
-    elif severity >= 6:
-        severity_level = "High"
-    elif severity >= 4:
-        severity_level = "Medium"
-    else:
-        severity_level = "Low"
+    severity_level = SEVERITY_LEVELS[bisect_right(SEVERITY_LEVEL_EDGES, severity)]
     
-    # Generate recommended actions based on validation
-    recommended_actions = []
+    # Recommended actions are fixed per outcome and severity level
     if is_valid:
-        recommended_actions.append("✅ Disaster report is VALID - activate response protocols")
-        
-        if severity >= 8:
-            recommended_actions.append("🚨 Deploy maximum available resources immediately")
-            recommended_actions.append("📢 Issue public alert and evacuation orders")
-            recommended_actions.append("📱 Activate emergency communication systems")
-        elif severity >= 6:
-            recommended_actions.append("⚠️ Deploy adequate resources to affected area")
-            recommended_actions.append("📊 Monitor situation closely for escalation")
-        else:
-            recommended_actions.append("👁️ Monitor situation and prepare resources")
-        
-        recommended_actions.append("🗺️ Establish command center at strategic location")
-        recommended_actions.append("🚑 Activate medical and rescue teams")
-        recommended_actions.append("📋 Begin damage assessment")
+        recommended_actions = VALID_RECOMMENDED_ACTIONS[severity_level]
     else:
-        recommended_actions.append("❌ Disaster report requires additional verification")
-        recommended_actions.append("🔍 Collect more credible evidence")
-        recommended_actions.append("📞 Contact source for confirmation")
-        recommended_actions.append("⏳ Monitor for corroborating reports")
+        recommended_actions = INVALID_RECOMMENDED_ACTIONS
     
     validation_reason = f"Validation Score: {validation_score}%. " + " | ".join(reasons)
     
@@ -1,10 +1,11 @@
 import math
 from datetime import datetime, timedelta
+from typing import Callable
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, or_, select, true, update
 from geoalchemy2.functions import ST_DWithin, ST_Distance
-from app.models import Resource, ResourceStatus, ResourceType, DispatchRecord
-from app.schemas import DispatchRequest, DispatchRecommendation
+from app.models import HAS_GEOMETRY, Resource, ResourceStatus, ResourceType, DispatchRecord
+from app.schemas import DispatchRequest, DispatchRecommendation, LocationUpdateRequest
 
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -25,6 +26,97 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return R * c
 
 
+def distance_from(latitude: float, longitude: float) -> Callable[[float, float], float]:
+    """
+    Haversine distance in km from a fixed origin, for loops over many rows.
+    The origin's radians and cosine are computed once here instead of on
+    every call, as haversine_distance would.
+    """
+    R = 6371  # Earth's radius in kilometers
+    radians, sin, cos, asin, sqrt = math.radians, math.sin, math.cos, math.asin, math.sqrt
+    
+    origin_lat = radians(latitude)
+    origin_lon = radians(longitude)
+    cos_origin = cos(origin_lat)
+    
+    def distance_to(row_latitude: float, row_longitude: float) -> float:
+        row_lat = radians(row_latitude)
+        a = (
+            sin((row_lat - origin_lat) / 2) ** 2
+            + cos_origin * cos(row_lat) * sin((radians(row_longitude) - origin_lon) / 2) ** 2
+        )
+        return 2 * R * asin(sqrt(min(a, 1.0)))
+    
+    return distance_to
+
+
+def rows_within_radius(rows, latitude: float, longitude: float, radius_km: float) -> list:
+    """
+    Haversine-filter rows carrying .latitude/.longitude against one origin.
+    Returns (row, distance_km) pairs within radius_km, nearest first.
+
+    The origin's trig is computed once, and rows are rejected on the
+    haversine term itself, so asin/sqrt only run for rows that are kept.
+    """
+    R = 6371  # Earth's radius in kilometers
+    radians, sin, cos = math.radians, math.sin, math.cos
+    
+    origin_lat = radians(latitude)
+    origin_lon = radians(longitude)
+    cos_origin = cos(origin_lat)
+    # a <= sin^2(d / 2R) is equivalent to distance <= d
+    max_a = sin(min(radius_km / (2 * R), math.pi / 2)) ** 2
+    
+    nearby = []
+    for row in rows:
+        row_lat = radians(row.latitude)
+        a = (
+            sin((row_lat - origin_lat) / 2) ** 2
+            + cos_origin * cos(row_lat) * sin((radians(row.longitude) - origin_lon) / 2) ** 2
+        )
+        if a <= max_a:
+            nearby.append((row, 2 * R * math.asin(math.sqrt(min(a, 1.0)))))
+    
+    nearby.sort(key=lambda pair: pair[1])
+    return nearby
+
+
+def within_bounding_box(latitude_column, longitude_column, latitude: float, longitude: float, radius_km: float):
+    """
+    SQL prefilter for rows that may lie within radius_km of a point: a
+    lat/lon box that lets the latitude/longitude indexes narrow the scan
+    before the exact Haversine check runs on the survivors. The box is
+    never smaller than the radius, including near the poles and across
+    the antimeridian.
+    """
+    # 111 km/degree is slightly under the Haversine figure, so the box errs wide
+    lat_delta = radius_km / 111.0
+    condition = latitude_column.between(latitude - lat_delta, latitude + lat_delta)
+    
+    # Longitude degrees shrink towards the pole, so size the box for its poleward edge
+    poleward_lat = min(abs(latitude) + lat_delta, 90.0)
+    cos_lat = math.cos(math.radians(poleward_lat))
+    if cos_lat < 1e-6:
+        return condition
+    lon_delta = radius_km / (111.0 * cos_lat)
+    if lon_delta >= 180.0:
+        return condition
+    
+    west, east = longitude - lon_delta, longitude + lon_delta
+    if west < -180.0:
+        lon_condition = or_(longitude_column >= west + 360.0, longitude_column <= east)
+    elif east > 180.0:
+        lon_condition = or_(longitude_column >= west, longitude_column <= east - 360.0)
+    else:
+        lon_condition = longitude_column.between(west, east)
+    return and_(condition, lon_condition)
+
+
+def ewkt_point(latitude: float, longitude: float) -> str:
+    """EWKT for a WGS84 point, the form the PostGIS geom columns are written in"""
+    return f"SRID=4326;POINT({longitude} {latitude})"
+
+
 def estimate_arrival_time(distance_km: float, resource_type: ResourceType) -> timedelta:
     """
     Estimate arrival time based on distance and resource type typical speeds
@@ -58,21 +150,34 @@ def get_nearby_resources(
     else:
         query = query.filter(Resource.status == ResourceStatus.AVAILABLE)
     
+    if HAS_GEOMETRY:
+        # Let PostGIS do the radius filter and ordering off the geography
+        # index instead of scanning every resource in Python
+        point = func.ST_GeogFromText(ewkt_point(latitude, longitude))
+        geography = func.geography(Resource.geom)
+        distance_m = ST_Distance(geography, point)
+        candidates = (
+            query.add_columns(distance_m / 1000.0)
+            .filter(ST_DWithin(geography, point, radius_km * 1000.0))
+            .order_by(distance_m)
+            .all()
+        )
+    else:
+        query = query.filter(
+            within_bounding_box(Resource.latitude, Resource.longitude, latitude, longitude, radius_km)
+        )
+        candidates = rows_within_radius(query.all(), latitude, longitude, radius_km)
+    
     nearby = []
     
-    for resource in query.all():
-        distance = haversine_distance(latitude, longitude, resource.latitude, resource.longitude)
-        
-        if distance <= radius_km:
-            arrival_time = estimate_arrival_time(distance, ResourceType(resource.type))
-            nearby.append({
-                "resource": resource,
-                "distance_km": round(distance, 2),
-                "estimated_arrival_minutes": round(arrival_time.total_seconds() / 60, 1)
-            })
-    
-    # Sort by distance
-    nearby.sort(key=lambda x: x["distance_km"])
+    for resource, distance in candidates:
+        arrival_time = estimate_arrival_time(distance, ResourceType(resource.type))
+        nearby.append({
+            "resource": resource,
+            "distance_km": round(distance, 2),
+            "estimated_arrival_minutes": round(arrival_time.total_seconds() / 60, 1)
+        })
+    
     return nearby
 
 
@@ -93,80 +198,64 @@ def auto_dispatch(
         Resource.status == ResourceStatus.AVAILABLE
     )
     
-    # Filter by resource type priority if specified
+    # Filter by resource type priority if specified; earlier types score higher
+    type_priority_scores = {}
     if dispatch_request.resource_type_priority:
-        priority_types = [rt.value for rt in dispatch_request.resource_type_priority]
-        query = query.filter(Resource.type.in_(priority_types))
+        priority_values = [rt.value for rt in dispatch_request.resource_type_priority]
+        query = query.filter(Resource.type.in_(priority_values))
+        for index, value in enumerate(priority_values):
+            type_priority_scores.setdefault(ResourceType(value), (len(priority_values) - index) * 100)
     
     resources = query.all()
     
     if not resources:
         raise ValueError("No available resources for dispatch")
     
-    # Calculate distances and score each resource
-    candidates = []
+    # Score each resource in one pass, keeping only the best so far:
+    # lower distance is better (negated), higher priority type is better
+    distance_to = distance_from(dispatch_request.disaster_lat, dispatch_request.disaster_lon)
+    best_score = -math.inf
+    best_resource = None
+    best_distance = 0.0
     
     for resource in resources:
-        distance = haversine_distance(
-            dispatch_request.disaster_lat,
-            dispatch_request.disaster_lon,
-            resource.latitude,
-            resource.longitude
-        )
-        
-        arrival_time = estimate_arrival_time(distance, ResourceType(resource.type))
-        
-        # Scoring logic: prioritize by distance + type + severity
-        type_priority_score = 0
-        if dispatch_request.resource_type_priority:
-            priority_values = [rt.value for rt in dispatch_request.resource_type_priority]
-            if resource.type in priority_values:
-                type_priority_score = (len(priority_values) - priority_values.index(resource.type)) * 100
-        
-        # Main score: lower distance is better (negate distance)
-        # Higher priority type is better
-        score = type_priority_score - distance
-        
-        candidates.append({
-            "resource": resource,
-            "distance": distance,
-            "arrival_time": arrival_time,
-            "score": score
-        })
+        distance = distance_to(resource.latitude, resource.longitude)
+        score = type_priority_scores.get(resource.type, 0) - distance
+        if score > best_score:
+            best_score, best_resource, best_distance = score, resource, distance
     
-    # Select best candidate
-    best = max(candidates, key=lambda x: x["score"])
+    best_arrival_time = estimate_arrival_time(best_distance, ResourceType(best_resource.type))
     
     # Create dispatch record
     dispatch_record = DispatchRecord(
-        resource_id=best["resource"].id,
+        resource_id=best_resource.id,
         disaster_lat=dispatch_request.disaster_lat,
         disaster_lon=dispatch_request.disaster_lon,
         disaster_type=dispatch_request.disaster_type,
         severity_score=dispatch_request.severity_score,
-        distance_km=best["distance"],
-        estimated_arrival=datetime.utcnow() + best["arrival_time"],
+        distance_km=best_distance,
+        estimated_arrival=datetime.utcnow() + best_arrival_time,
         status="dispatched"
     )
     
     db.add(dispatch_record)
     
     # Update resource status to busy
-    best["resource"].status = ResourceStatus.BUSY
-    db.add(best["resource"])
+    best_resource.status = ResourceStatus.BUSY
+    db.add(best_resource)
     db.commit()
     
     return DispatchRecommendation(
-        resource_id=best["resource"].id,
-        resource_name=best["resource"].name,
-        resource_type=ResourceType(best["resource"].type),
-        distance_km=round(best["distance"], 2),
+        resource_id=best_resource.id,
+        resource_name=best_resource.name,
+        resource_type=ResourceType(best_resource.type),
+        distance_km=round(best_distance, 2),
         current_location={
-            "latitude": best["resource"].latitude,
-            "longitude": best["resource"].longitude
+            "latitude": best_resource.latitude,
+            "longitude": best_resource.longitude
         },
-        estimated_arrival_minutes=round(best["arrival_time"].total_seconds() / 60, 1),
-        reason=f"Best match: {best['distance']:.1f}km away, Type: {best['resource'].type}"
+        estimated_arrival_minutes=round(best_arrival_time.total_seconds() / 60, 1),
+        reason=f"Best match: {best_distance:.1f}km away, Type: {best_resource.type}"
     )
 
 
@@ -179,13 +268,15 @@ def update_resource_location(
     heading: float = 0.0
 ) -> Resource:
     """Update resource location"""
-    resource = db.query(Resource).filter(Resource.id == resource_id).first()
+    resource = db.get(Resource, resource_id)
     
     if not resource:
         raise ValueError(f"Resource {resource_id} not found")
     
     resource.latitude = latitude
     resource.longitude = longitude
+    if HAS_GEOMETRY:
+        resource.geom = ewkt_point(latitude, longitude)
     resource.speed = speed
     resource.heading = heading
     resource.last_updated = datetime.utcnow()
@@ -195,3 +286,36 @@ def update_resource_location(
     db.refresh(resource)
     
     return resource
+
+
+def update_resource_locations(db: Session, updates: list[LocationUpdateRequest]) -> tuple[list[int], list[int]]:
+    """
+    Apply a burst of location updates as one executemany UPDATE.
+    A resource reported more than once keeps its last update.
+    Returns (updated ids, unknown ids).
+    """
+    latest = {update_.resource_id: update_ for update_ in updates}
+    known = set(db.scalars(select(Resource.id).where(Resource.id.in_(latest))))
+    
+    now = datetime.utcnow()
+    params = []
+    for resource_id, update_ in latest.items():
+        if resource_id not in known:
+            continue
+        row = {
+            "id": resource_id,
+            "latitude": update_.latitude,
+            "longitude": update_.longitude,
+            "speed": update_.speed,
+            "heading": update_.heading,
+            "last_updated": now,
+        }
+        if HAS_GEOMETRY:
+            row["geom"] = ewkt_point(update_.latitude, update_.longitude)
+        params.append(row)
+    
+    if params:
+        db.execute(update(Resource), params)
+        db.commit()
+    
+    return [row["id"] for row in params], [resource_id for resource_id in latest if resource_id not in known]
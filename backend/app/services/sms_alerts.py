@@ -9,7 +9,8 @@ from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.models import AlertSubscriber, Shelter, SMSAlertLog, SOSReport
-from app.services.dispatch import haversine_distance
+from app.services.bulk import bulk_insert
+from app.services.dispatch import distance_from, rows_within_radius, within_bounding_box
 
 
 @dataclass
@@ -61,12 +62,14 @@ def pick_safe_shelters(
         .all()
     )
 
+    impact_distance = distance_from(incident_lat, incident_lng)
+    user_distance = distance_from(recipient_lat, recipient_lng)
     ranked: List[Tuple[Shelter, float]] = []
     for shelter in shelters:
-        impact_dist = haversine_distance(incident_lat, incident_lng, shelter.latitude, shelter.longitude)
+        impact_dist = impact_distance(shelter.latitude, shelter.longitude)
         if impact_dist <= impact_radius_km:
             continue
-        dist_to_user = haversine_distance(recipient_lat, recipient_lng, shelter.latitude, shelter.longitude)
+        dist_to_user = user_distance(shelter.latitude, shelter.longitude)
         ranked.append((shelter, dist_to_user))
 
     ranked.sort(key=lambda x: x[1])
@@ -82,25 +85,29 @@ def get_target_recipients(
     recipients: List[Tuple[str, float, float]] = []
     seen = set()
 
+    # The lat/lon box drops far-away (and location-less) subscribers in SQL,
+    # so only the survivors get the exact distance check
     subs = (
         db.query(AlertSubscriber)
-        .filter(AlertSubscriber.is_active == 1, AlertSubscriber.consent_sms == 1)
+        .filter(
+            AlertSubscriber.is_active == 1,
+            AlertSubscriber.consent_sms == 1,
+            within_bounding_box(AlertSubscriber.latitude, AlertSubscriber.longitude, incident_lat, incident_lng, radius_km),
+        )
         .all()
     )
-    for sub in subs:
-        if sub.latitude is None or sub.longitude is None:
-            continue
-        d = haversine_distance(incident_lat, incident_lng, sub.latitude, sub.longitude)
-        if d <= radius_km and sub.phone not in seen:
+    for sub, _ in rows_within_radius(subs, incident_lat, incident_lng, radius_km):
+        if sub.phone not in seen:
             seen.add(sub.phone)
             recipients.append((sub.phone, float(sub.latitude), float(sub.longitude)))
 
     # Add SOS reporters as emergency fallback recipients if phone exists and coordinates are nearby.
     reports = db.query(SOSReport).filter(SOSReport.reporter_phone.isnot(None)).order_by(SOSReport.reported_at.desc()).limit(200).all()
+    incident_distance = distance_from(incident_lat, incident_lng)
     for report in reports:
         if report.latitude is None or report.longitude is None:
             continue
-        d = haversine_distance(incident_lat, incident_lng, report.latitude, report.longitude)
+        d = incident_distance(report.latitude, report.longitude)
         phone = (report.reporter_phone or "").strip()
         if d <= radius_km and phone and phone not in seen:
             seen.add(phone)
@@ -141,38 +148,39 @@ async def dispatch_evacuation_sms(
     sent = 0
     failed = 0
     rows = []
+    provider = (settings.sms_provider or "mock").lower()
 
     for phone, rlat, rlng in recipients:
         safe = pick_safe_shelters(db, rlat, rlng, incident_lat, incident_lng, impact_radius_km, limit=2)
         text = build_evacuation_message(incident_title, incident_lat, incident_lng, impact_radius_km, safe)
         result = await send_sms(phone, text)
 
-        log = SMSAlertLog(
-            incident_title=incident_title,
-            incident_latitude=incident_lat,
-            incident_longitude=incident_lng,
-            impact_radius_km=impact_radius_km,
-            recipient_phone=phone,
-            message=text,
-            status="sent" if result.success else "failed",
-            provider=(settings.sms_provider or "mock").lower(),
-            provider_message_id=result.provider_message_id,
-            error=result.error,
-            sent_at=datetime.utcnow() if result.success else None,
+        rows.append(
+            {
+                "incident_title": incident_title,
+                "incident_latitude": incident_lat,
+                "incident_longitude": incident_lng,
+                "impact_radius_km": impact_radius_km,
+                "recipient_phone": phone,
+                "message": text,
+                "status": "sent" if result.success else "failed",
+                "provider": provider,
+                "provider_message_id": result.provider_message_id,
+                "error": result.error,
+                "sent_at": datetime.utcnow() if result.success else None,
+            }
         )
-        db.add(log)
-        rows.append(log)
         if result.success:
             sent += 1
         else:
             failed += 1
 
-    db.commit()
+    bulk_insert(db, SMSAlertLog, rows)
     return {
         "incident_title": incident_title,
         "total_targeted": len(recipients),
         "sent": sent,
         "failed": failed,
-        "provider": (settings.sms_provider or "mock").lower(),
+        "provider": provider,
         "timestamp": datetime.utcnow().isoformat(),
     }
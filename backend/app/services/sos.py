@@ -3,14 +3,18 @@ SOS Service - Citizen emergency reporting and alert broadcasting
 Phase 5: Citizen SOS + Real-Time Alerts
 """
 
+import math
+from collections import defaultdict
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
-from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Tuple
+from geoalchemy2.functions import ST_DWithin, ST_Distance
+from sqlalchemy import Boolean, Float, Integer, and_, case, cast, func, insert, literal, null, select
+from sqlalchemy.orm import Bundle, Session, defer
 from app.models import (
-    SOSReport, CrowdAssistance, AlertBroadcast, Resource,
+    HAS_GEOMETRY, SOSReport, CrowdAssistance, AlertBroadcast, Resource,
     SOSStatus, ResourceStatus
 )
-from app.services.dispatch import haversine_distance
+from app.services.dispatch import ewkt_point, haversine_distance, rows_within_radius, within_bounding_box
 
 
 ACTIVE_SOS_STATUSES = (
@@ -20,6 +24,41 @@ ACTIVE_SOS_STATUSES = (
 )
 
 
+# List views don't return the incident metadata JSON or the PostGIS points,
+# so they're left unloaded there
+SOS_LIST_OPTIONS = (
+    defer(SOSReport.incident_metadata),
+    *((defer(SOSReport.geom), defer(SOSReport.geog)) if HAS_GEOMETRY else ()),
+)
+
+# The same list view as plain rows shaped like SOSReportListItem, for
+# endpoints that serialize straight to JSON without building ORM objects
+SOS_LIST_ROW = Bundle(
+    "sos_report",
+    SOSReport.id,
+    SOSReport.reporter_name,
+    SOSReport.reporter_phone,
+    SOSReport.reporter_email,
+    SOSReport.latitude,
+    SOSReport.longitude,
+    SOSReport.emergency_type,
+    SOSReport.description,
+    SOSReport.severity_score,
+    SOSReport.status,
+    SOSReport.num_people_affected,
+    SOSReport.has_injuries,
+    SOSReport.requires_evacuation,
+    cast(SOSReport.is_urgent, Boolean).label("is_urgent"),
+    SOSReport.nearest_resource_id,
+    cast(null(), Float).label("distance_to_nearest_resource_km"),
+    cast(SOSReport.crowd_assistance_enabled, Boolean).label("crowd_assistance_enabled"),
+    SOSReport.reported_at,
+    SOSReport.acknowledged_at,
+    SOSReport.resolved_at,
+    single_entity=True,
+)
+
+
 def _normalize_sos_status(status: str | SOSStatus) -> SOSStatus:
     if isinstance(status, SOSStatus):
         return status
@@ -94,7 +133,7 @@ def create_sos_report(
     )
     
     if getattr(SOSReport, "geom", None) is not None:
-        sos_report.geom = f"POINT({longitude} {latitude})"
+        sos_report.geom = ewkt_point(latitude, longitude)
     
     db.add(sos_report)
     db.commit()
@@ -111,7 +150,7 @@ def update_sos_report(
     nearest_resource_id: Optional[int] = None,
 ) -> Optional[SOSReport]:
     """Update SOS report status and details"""
-    sos = db.query(SOSReport).filter(SOSReport.id == sos_id).first()
+    sos = db.get(SOSReport, sos_id)
     if not sos:
         return None
     
@@ -153,15 +192,17 @@ def find_nearby_sos_reports(
     radius_km: float = 5.0,
     status_filter: Optional[str] = None,
     limit: int = 20,
+    as_rows: bool = False,
 ) -> List[Tuple[SOSReport, float]]:
     """
     Find nearby SOS reports within radius
     
     Returns:
-        List of (SOSReport, distance_km) tuples sorted by distance
+        List of (SOSReport, distance_km) tuples sorted by distance; with
+        as_rows, SOS_LIST_ROW rows take the place of the SOSReport objects
     """
     # Get all SOS reports with specified status
-    query = db.query(SOSReport)
+    query = db.query(SOS_LIST_ROW) if as_rows else db.query(SOSReport).options(*SOS_LIST_OPTIONS)
     
     normalized_filter = (status_filter or "").strip().lower()
 
@@ -171,22 +212,47 @@ def find_nearby_sos_reports(
         # Exclude resolved/cancelled by default
         query = query.filter(SOSReport.status.in_(ACTIVE_SOS_STATUSES))
     
-    reports = query.all()
-    
-    # Calculate distances
-    nearby = []
-    for report in reports:
-        distance = haversine_distance(
-            latitude, longitude,
-            report.latitude, report.longitude
+    if HAS_GEOMETRY:
+        # Radius filter and KNN ordering both run off the geography index
+        point = func.ST_GeogFromText(ewkt_point(latitude, longitude))
+        geography = SOSReport.geog
+        rows = (
+            query.add_columns(ST_Distance(geography, point) / 1000.0)
+            .filter(ST_DWithin(geography, point, radius_km * 1000.0))
+            .order_by(geography.op("<->")(point))
+            .limit(limit)
+            .all()
         )
-        if distance <= radius_km:
-            nearby.append((report, distance))
-    
-    # Sort by distance
-    nearby.sort(key=lambda x: x[1])
-    
-    return nearby[:limit]
+        return [(report, distance) for report, distance in rows]
+    
+    # Without PostGIS the box narrows the scan on the lat/lon index and the
+    # SQL haversine does the exact cut, ordering and LIMIT in the database
+    distance_km = _distance_km_sql(latitude, longitude, SOSReport.latitude, SOSReport.longitude)
+    rows = (
+        query.add_columns(distance_km)
+        .filter(
+            within_bounding_box(SOSReport.latitude, SOSReport.longitude, latitude, longitude, radius_km),
+            distance_km <= radius_km,
+        )
+        .order_by(distance_km)
+        .limit(limit)
+        .all()
+    )
+    return [(report, distance) for report, distance in rows]
+
+
+def _distance_km_sql(latitude, longitude, latitude_column, longitude_column):
+    """
+    Haversine distance in km as a SQL expression (PostgreSQL / SQLite math
+    functions); the origin may be plain floats or columns
+    """
+    a = (
+        func.power(func.sin(func.radians(latitude_column - latitude) / 2.0), 2)
+        + func.cos(func.radians(latitude))
+        * func.cos(func.radians(latitude_column))
+        * func.power(func.sin(func.radians(longitude_column - longitude) / 2.0), 2)
+    )
+    return 2 * 6371.0 * func.asin(func.sqrt(a))
 
 
 def find_nearby_resources(
@@ -209,20 +275,142 @@ def find_nearby_resources(
     if resource_types:
         query = query.filter(Resource.type.in_(resource_types))
     
-    resources = query.all()
+    if HAS_GEOMETRY:
+        point = func.ST_GeogFromText(ewkt_point(sos_latitude, sos_longitude))
+        geography = func.geography(Resource.geom)
+        rows = (
+            query.add_columns(ST_Distance(geography, point) / 1000.0)
+            .filter(ST_DWithin(geography, point, radius_km * 1000.0))
+            .order_by(geography.op("<->")(point))
+            .all()
+        )
+        return [(resource, distance) for resource, distance in rows]
+    
+    resources = query.filter(
+        within_bounding_box(Resource.latitude, Resource.longitude, sos_latitude, sos_longitude, radius_km)
+    ).all()
     
-    nearby = []
-    for resource in resources:
-        distance = haversine_distance(
-            sos_latitude, sos_longitude,
-            resource.latitude, resource.longitude
+    return rows_within_radius(resources, sos_latitude, sos_longitude, radius_km)
+
+
+def find_resources_near_sos(db: Session, sos_id: int, radius_km: float = 10.0) -> Optional[list]:
+    """
+    Available resources within radius_km of an SOS report, nearest first,
+    as rows of (id, name, type, latitude, longitude, status, distance_km).
+
+    The report's location is read in the same statement (a one-row CTE
+    outer-joined to resources), so this is a single round trip. Returns
+    None if the report doesn't exist.
+    """
+    sos = (
+        select(
+            SOSReport.latitude,
+            SOSReport.longitude,
+            *((SOSReport.geog,) if HAS_GEOMETRY else ()),
         )
-        if distance <= radius_km:
-            nearby.append((resource, distance))
+        .where(SOSReport.id == sos_id)
+        .cte("sos")
+    )
     
-    nearby.sort(key=lambda x: x[1])
+    if HAS_GEOMETRY:
+        geography = func.geography(Resource.geom)
+        distance = ST_Distance(geography, sos.c.geog) / 1000.0
+        in_range = ST_DWithin(geography, sos.c.geog, radius_km * 1000.0)
+    else:
+        distance = _distance_km_sql(sos.c.latitude, sos.c.longitude, Resource.latitude, Resource.longitude)
+        in_range = distance <= radius_km
+    
+    distance_km = distance.label("distance_km")
+    rows = db.execute(
+        select(
+            Resource.id,
+            Resource.name,
+            Resource.type,
+            Resource.latitude,
+            Resource.longitude,
+            Resource.status,
+            distance_km,
+        )
+        .select_from(sos)
+        .outerjoin(Resource, and_(Resource.status == ResourceStatus.AVAILABLE, in_range))
+        .order_by(distance_km)
+    ).all()
     
-    return nearby
+    if not rows:
+        return None
+    # An existing report with nothing in range comes back as one all-NULL row
+    return [row for row in rows if row.id is not None]
+
+
+KM_PER_DEGREE = 111.32
+
+
+def _group_reports_by_grid(reports: List[SOSReport], cluster_radius_km: float) -> List[List[SOSReport]]:
+    """
+    Radius clustering into connected components: reports within the radius
+    of each other share a cluster, transitively, as ST_ClusterDBSCAN does
+    on PostGIS. Reports are bucketed into radius-sized lat/lon cells so each
+    report is only compared against its neighbouring cells instead of
+    against every other report, and linked pairs are merged with union-find.
+    """
+    if not reports:
+        return []
+    if cluster_radius_km <= 0:
+        # Nothing is within a zero radius of anything else
+        return [[report] for report in reports]
+    
+    cell_lat = cluster_radius_km / KM_PER_DEGREE
+    # Longitude degrees shrink towards the poles; size columns for the
+    # highest latitude present so a radius never spans more than one column.
+    # Columns wrap at the antimeridian.
+    max_abs_lat = max(abs(report.latitude) for report in reports)
+    cell_lon = cell_lat / max(math.cos(math.radians(max_abs_lat)), 0.01)
+    num_cols = max(1, math.floor(360.0 / cell_lon))
+    col_width = 360.0 / num_cols
+    
+    cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    keys = []
+    for index, report in enumerate(reports):
+        key = (
+            math.floor(report.latitude / cell_lat),
+            math.floor((report.longitude + 180.0) / col_width) % num_cols,
+        )
+        cells[key].append(index)
+        keys.append(key)
+    
+    parent = list(range(len(reports)))
+    
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    for i, report in enumerate(reports):
+        row, col = keys[i]
+        neighbour_cols = {(col + d_col) % num_cols for d_col in (-1, 0, 1)}
+        for d_row in (-1, 0, 1):
+            for neighbour_col in neighbour_cols:
+                for j in cells.get((row + d_row, neighbour_col), ()):
+                    if j <= i:
+                        continue
+                    root_i, root_j = find(i), find(j)
+                    if root_i == root_j:
+                        continue
+                    distance = haversine_distance(
+                        report.latitude, report.longitude,
+                        reports[j].latitude, reports[j].longitude
+                    )
+                    if distance <= cluster_radius_km:
+                        # Keep the lower index as root so clusters come out
+                        # in the order of their first report
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+    
+    grouped: Dict[int, List[SOSReport]] = defaultdict(list)
+    for i, report in enumerate(reports):
+        grouped[find(i)].append(report)
+    
+    return list(grouped.values())
 
 
 def cluster_sos_reports(
@@ -235,60 +423,57 @@ def cluster_sos_reports(
     Returns:
         List of cluster dictionaries with aggregated info
     """
-    # Get all active SOS reports
-    active_reports = db.query(SOSReport).filter(
+    active_query = db.query(SOSReport).filter(
         SOSReport.status.in_(ACTIVE_SOS_STATUSES)
+    )
+    
+    if HAS_GEOMETRY:
+        # PostGIS labels every active report with its cluster in one pass.
+        # DBSCAN is planar, so cluster in Web Mercator metres rather than
+        # degrees (a degree of longitude shrinks with latitude); Mercator
+        # stretches distances by 1/cos(latitude), so eps is scaled at the
+        # reports' mean latitude to stay a ground radius like the fallback's.
+        located_query = active_query.filter(SOSReport.geom.isnot(None))
+        mean_latitude = (
+            select(func.avg(SOSReport.latitude))
+            .where(SOSReport.status.in_(ACTIVE_SOS_STATUSES), SOSReport.geom.isnot(None))
+            .scalar_subquery()
+        )
+        eps_m = cast(cluster_radius_km * 1000.0 / func.cos(func.radians(mean_latitude)), Float)
+        cluster_id = func.ST_ClusterDBSCAN(func.ST_Transform(SOSReport.geom, 3857), eps_m, 1).over()
+        grouped: Dict[int, List[SOSReport]] = defaultdict(list)
+        for report, cid in located_query.add_columns(cluster_id).order_by(SOSReport.id).all():
+            grouped[cid].append(report)
+        groups = list(grouped.values())
+    else:
+        groups = _group_reports_by_grid(active_query.order_by(SOSReport.id).all(), cluster_radius_km)
+    
+    # One read of the available resources, counted against every cluster centre
+    available_resources = db.query(Resource.latitude, Resource.longitude).filter(
+        Resource.status == ResourceStatus.AVAILABLE
     ).all()
     
     clusters = []
-    processed = set()
-    
-    for i, report in enumerate(active_reports):
-        if i in processed:
-            continue
+    for cluster_reports in groups:
+        avg_lat = sum(r.latitude for r in cluster_reports) / len(cluster_reports)
+        avg_lon = sum(r.longitude for r in cluster_reports) / len(cluster_reports)
         
-        # Start new cluster
-        cluster_reports = [report]
-        processed.add(i)
+        emergency_types = [r.emergency_type for r in cluster_reports]
+        most_recent = max(r.reported_at for r in cluster_reports)
         
-        # Find nearby reports
-        for j in range(i + 1, len(active_reports)):
-            if j in processed:
-                continue
-            
-            distance = haversine_distance(
-                report.latitude, report.longitude,
-                active_reports[j].latitude, active_reports[j].longitude
-            )
-            
-            if distance <= cluster_radius_km:
-                cluster_reports.append(active_reports[j])
-                processed.add(j)
+        nearby_resources = len(rows_within_radius(available_resources, avg_lat, avg_lon, 5.0))
         
-        # Calculate cluster stats
-        if cluster_reports:
-            avg_lat = sum(r.latitude for r in cluster_reports) / len(cluster_reports)
-            avg_lon = sum(r.longitude for r in cluster_reports) / len(cluster_reports)
-            
-            emergency_types = [r.emergency_type for r in cluster_reports]
-            most_recent = max(r.reported_at for r in cluster_reports)
-            
-            # Count nearby resources
-            nearby_resources = find_nearby_resources(
-                db, avg_lat, avg_lon, radius_km=5.0
-            )
-            
-            clusters.append({
-                "cluster_id": f"cluster_{len(clusters)}",
-                "center_latitude": avg_lat,
-                "center_longitude": avg_lon,
-                "num_incidents": len(cluster_reports),
-                "severity_average": sum(r.severity_score for r in cluster_reports) / len(cluster_reports),
-                "incident_types": list(set(emergency_types)),
-                "most_recent_incident": most_recent,
-                "nearby_resources": len(nearby_resources),
-                "incidents": cluster_reports,
-            })
+        clusters.append({
+            "cluster_id": f"cluster_{len(clusters)}",
+            "center_latitude": avg_lat,
+            "center_longitude": avg_lon,
+            "num_incidents": len(cluster_reports),
+            "severity_average": sum(r.severity_score for r in cluster_reports) / len(cluster_reports),
+            "incident_types": list(set(emergency_types)),
+            "most_recent_incident": most_recent,
+            "nearby_resources": nearby_resources,
+            "incidents": cluster_reports,
+        })
     
     return clusters
 
@@ -302,10 +487,14 @@ def offer_crowd_assistance(
     longitude: float,
     assistance_type: str,
     description: str,
-) -> CrowdAssistance:
+) -> Optional[CrowdAssistance]:
     """
     Record citizen offering assistance
     
+    The offer is written with a single INSERT ... SELECT from the SOS row,
+    guarded by its crowd_assistance_enabled flag, so the check and the
+    insert can't race and the distance/ETA are computed in the same statement.
+    
     Args:
         db: Database session
         sos_report_id: SOS report being helped
@@ -317,38 +506,45 @@ def offer_crowd_assistance(
         description: What help they can provide
         
     Returns:
-        CrowdAssistance: Created record
+        CrowdAssistance: Created record, or None if the SOS report doesn't
+        exist or doesn't accept crowd assistance
     """
-    # Get SOS report to calculate distance
-    sos_report = db.query(SOSReport).filter(SOSReport.id == sos_report_id).first()
-    if not sos_report:
-        raise ValueError(f"SOS report {sos_report_id} not found")
-    
-    distance = haversine_distance(
-        latitude, longitude,
-        sos_report.latitude, sos_report.longitude
+    distance = (
+        select(_distance_km_sql(latitude, longitude, SOSReport.latitude, SOSReport.longitude).label("distance_km"))
+        .where(SOSReport.id == sos_report_id, SOSReport.crowd_assistance_enabled != 0)
+        .subquery()
+        .c.distance_km
     )
     
     # Estimate arrival time (assume 40 km/h average speed for civilians)
-    estimated_arrival = max(1, int(distance / 40 * 60)) if distance > 0 else 5
-    
-    assistance = CrowdAssistance(
-        sos_report_id=sos_report_id,
-        helper_name=helper_name,
-        helper_phone=helper_phone,
-        latitude=latitude,
-        longitude=longitude,
-        geom=f"POINT({longitude} {latitude})",
-        assistance_type=assistance_type,
-        description=description,
-        distance_km=distance,
-        estimated_arrival_min=estimated_arrival,
-        availability_status="available",
+    minutes = distance / 40.0 * 60.0
+    estimated_arrival = case(
+        (distance <= 0, 5),
+        (minutes < 1, 1),
+        else_=cast(func.floor(minutes), Integer),
     )
     
-    db.add(assistance)
+    values = {
+        "sos_report_id": literal(sos_report_id),
+        "helper_name": literal(helper_name),
+        "helper_phone": literal(helper_phone),
+        "latitude": literal(latitude),
+        "longitude": literal(longitude),
+        "assistance_type": literal(assistance_type),
+        "description": literal(description),
+        "distance_km": distance,
+        "estimated_arrival_min": estimated_arrival,
+        "availability_status": literal("available"),
+    }
+    if HAS_GEOMETRY:
+        values["geom"] = literal(ewkt_point(latitude, longitude), CrowdAssistance.geom.type)
+    
+    assistance = db.scalars(
+        insert(CrowdAssistance)
+        .from_select(list(values), select(*values.values()))
+        .returning(CrowdAssistance)
+    ).first()
     db.commit()
-    db.refresh(assistance)
     
     return assistance
 
@@ -366,11 +562,8 @@ def get_crowd_assistance_for_sos(
     if available_only:
         query = query.filter(CrowdAssistance.availability_status == "available")
     
-    # Sort by distance (closest first)
-    assistance_offers = query.all()
-    assistance_offers.sort(key=lambda x: x.distance_km)
-    
-    return assistance_offers
+    # Closest first
+    return query.order_by(CrowdAssistance.distance_km).all()
 
 
 def accept_crowd_assistance(
@@ -413,7 +606,7 @@ def broadcast_alert(
     Returns:
         AlertBroadcast: Created broadcast record
     """
-    sos_report = db.query(SOSReport).filter(SOSReport.id == sos_report_id).first()
+    sos_report = db.get(SOSReport, sos_report_id)
     if not sos_report:
         raise ValueError(f"SOS report {sos_report_id} not found")
     
@@ -473,16 +666,16 @@ def get_sos_analytics(db: Session) -> Dict:
         Dictionary with various metrics
     """
     # Active SOS count
-    active_sos = db.query(SOSReport).filter(
+    active_sos = db.query(func.count(SOSReport.id)).filter(
         SOSReport.status.in_(ACTIVE_SOS_STATUSES)
-    ).count()
+    ).scalar()
     
     # Resolved today
     today = datetime.utcnow().date()
-    resolved_today = db.query(SOSReport).filter(
+    resolved_today = db.query(func.count(SOSReport.id)).filter(
         SOSReport.status == SOSStatus.RESOLVED,
         SOSReport.resolved_at >= datetime.combine(today, datetime.min.time())
-    ).count()
+    ).scalar()
     
     # Average response time
     responded_sos = db.query(SOSReport).filter(
@@ -503,25 +696,34 @@ def get_sos_analytics(db: Session) -> Dict:
     most_common = max(set(emergency_types), key=emergency_types.count) if emergency_types else "unknown"
     
     # Urgent cases
-    urgent_count = db.query(SOSReport).filter(
+    urgent_count = db.query(func.count(SOSReport.id)).filter(
         SOSReport.is_urgent == 1,
         SOSReport.status.in_(ACTIVE_SOS_STATUSES)
-    ).count()
+    ).scalar()
     
     # Crowd assistance available
-    available_helpers = db.query(CrowdAssistance).filter(
+    available_helpers = db.query(func.count(CrowdAssistance.id)).filter(
         CrowdAssistance.availability_status == "available"
-    ).count()
-    
-    # Nearby resources (within 10km of any active SOS)
-    active_sos_list = db.query(SOSReport).filter(
-        SOSReport.status.in_(ACTIVE_SOS_STATUSES)
-    ).all()
+    ).scalar()
     
-    nearby_resources_count = 0
-    for sos in active_sos_list:
-        nearby = find_nearby_resources(db, sos.latitude, sos.longitude, radius_km=10.0)
-        nearby_resources_count += len(nearby)
+    # Nearby resources (within 10km of any active SOS): every (SOS, resource)
+    # pair is counted in one join instead of a radius query per report
+    radius_km = 10.0
+    if HAS_GEOMETRY:
+        within_radius = ST_DWithin(SOSReport.geog, func.geography(Resource.geom), radius_km * 1000.0)
+    else:
+        lat_margin = radius_km / KM_PER_DEGREE
+        within_radius = and_(
+            Resource.latitude.between(SOSReport.latitude - lat_margin, SOSReport.latitude + lat_margin),
+            _distance_km_sql(SOSReport.latitude, SOSReport.longitude, Resource.latitude, Resource.longitude)
+            <= radius_km,
+        )
+    nearby_resources_count = db.query(func.count()).select_from(SOSReport).join(
+        Resource, within_radius
+    ).filter(
+        SOSReport.status.in_(ACTIVE_SOS_STATUSES),
+        Resource.status == ResourceStatus.AVAILABLE,
+    ).scalar()
     
     return {
         "total_active_sos": active_sos,
@@ -536,29 +738,44 @@ def get_sos_analytics(db: Session) -> Dict:
 
 def get_sos_report(db: Session, sos_id: int) -> Optional[SOSReport]:
     """Get a specific SOS report"""
-    report = db.query(SOSReport).filter(SOSReport.id == sos_id).first()
+    report = db.get(SOSReport, sos_id)
     return _attach_metadata_alias(report) if report else None
 
 
-def get_all_active_sos(db: Session, limit: int = 50) -> List[SOSReport]:
-    """Get all active SOS reports"""
-    reports = db.query(SOSReport).filter(
+def get_all_active_sos(
+    db: Session,
+    limit: int = 50,
+    yield_per: Optional[int] = None,
+    as_rows: bool = False,
+) -> Iterable[SOSReport]:
+    """
+    Get all active SOS reports
+
+    With yield_per, returns an iterator that fetches rows in batches of
+    that size instead of a fully loaded list. With as_rows, returns
+    SOS_LIST_ROW rows instead of SOSReport objects.
+    """
+    query = (db.query(SOS_LIST_ROW) if as_rows else db.query(SOSReport).options(*SOS_LIST_OPTIONS)).filter(
         SOSReport.status.in_(ACTIVE_SOS_STATUSES)
-    ).order_by(SOSReport.reported_at.desc()).limit(limit).all()
-    return [_attach_metadata_alias(report) for report in reports]
+    ).order_by(SOSReport.reported_at.desc()).limit(limit)
+    
+    return query.yield_per(yield_per) if yield_per else query.all()
 
 
 def search_sos_by_type(
     db: Session,
     emergency_type: str,
     active_only: bool = True,
-) -> List[SOSReport]:
-    """Search SOS reports by emergency type"""
-    query = db.query(SOSReport).filter(SOSReport.emergency_type == emergency_type)
+    yield_per: Optional[int] = None,
+) -> Iterable[SOSReport]:
+    """Search SOS reports by emergency type (batched iterator with yield_per)"""
+    query = db.query(SOSReport).options(*SOS_LIST_OPTIONS).filter(
+        SOSReport.emergency_type == emergency_type
+    )
     
     if active_only:
         query = query.filter(
             SOSReport.status.in_(ACTIVE_SOS_STATUSES)
         )
     
-    return [_attach_metadata_alias(report) for report in query.all()]
+    return query.yield_per(yield_per) if yield_per else query.all()
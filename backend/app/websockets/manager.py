@@ -1,8 +1,30 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import List, Dict
-import json
+from typing import Iterable, List, Dict, Tuple, Union
 from datetime import datetime
 import asyncio
+import orjson
+
+
+def encode_message(message: Union[dict, str]) -> str:
+    """
+    JSON text for a frame; an already-encoded payload passes through, so a
+    message fanned out through several broadcast calls is serialized once
+    """
+    if isinstance(message, str):
+        return message
+    # Text frames: clients JSON.parse the frame data
+    return orjson.dumps(message).decode()
+
+
+# Keep-alive frames as clients serialize them (JSON.stringify / json.dumps), so
+# pings are answered before any JSON parsing; other spellings still parse normally
+PING_FRAMES = frozenset(('{"type":"ping"}', '{"type": "ping"}'))
+PONG_FRAME = '{"type":"pong"}'
+
+
+async def send_message(websocket: WebSocket, message: Union[dict, str]):
+    """Send one JSON text frame, encoded with orjson"""
+    await websocket.send_text(encode_message(message))
 
 
 class ConnectionManager:
@@ -10,7 +32,10 @@ class ConnectionManager:
     
     def __init__(self):
         self.active_connections: List[WebSocket] = []
-        self.subscriptions: Dict[str, List[WebSocket]] = {}  # resource_id -> [websockets]
+        # channel -> subscribed websockets (dicts as insertion-ordered sets)
+        self.subscriptions: Dict[str, Dict[WebSocket, None]] = {}
+        # Reverse index: websocket -> {subscription name: channels it covers}
+        self._ws_channels: Dict[WebSocket, Dict[str, Tuple[str, ...]]] = {}
     
     async def connect(self, websocket: WebSocket):
         """Accept and register new connection"""
@@ -18,47 +43,82 @@ class ConnectionManager:
         self.active_connections.append(websocket)
     
     async def disconnect(self, websocket: WebSocket):
-        """Remove websocket connection"""
-        self.active_connections.remove(websocket)
+        """Remove websocket connection and everything it subscribed to"""
+        # A failed broadcast may already have dropped it
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
         
-        # Remove from subscriptions
-        for resource_id in list(self.subscriptions.keys()):
-            if websocket in self.subscriptions[resource_id]:
-                self.subscriptions[resource_id].remove(websocket)
-                if not self.subscriptions[resource_id]:
-                    del self.subscriptions[resource_id]
+        for channels in self._ws_channels.pop(websocket, {}).values():
+            self._remove_from_channels(websocket, channels)
+    
+    def _remove_from_channels(self, websocket: WebSocket, channels: Iterable[str]):
+        for channel in channels:
+            subscribers = self.subscriptions.get(channel)
+            if subscribers is None:
+                continue
+            subscribers.pop(websocket, None)
+            if not subscribers:
+                del self.subscriptions[channel]
     
-    async def subscribe(self, websocket: WebSocket, resource_id: str):
-        """Subscribe to resource updates"""
-        if resource_id not in self.subscriptions:
-            self.subscriptions[resource_id] = []
-        if websocket not in self.subscriptions[resource_id]:
-            self.subscriptions[resource_id].append(websocket)
+    async def subscribe(self, websocket: WebSocket, resource_id: str, channels: Iterable[str] = None):
+        """
+        Subscribe to resource updates. `channels` registers the subscription
+        on several underlying channels at once under the single name
+        `resource_id`, which is what the client unsubscribes with.
+        """
+        channels = tuple(channels) if channels is not None else (resource_id,)
+        for channel in channels:
+            self.subscriptions.setdefault(channel, {})[websocket] = None
+        self._ws_channels.setdefault(websocket, {})[resource_id] = channels
     
     async def unsubscribe(self, websocket: WebSocket, resource_id: str):
         """Unsubscribe from resource updates"""
-        if resource_id in self.subscriptions:
-            if websocket in self.subscriptions[resource_id]:
-                self.subscriptions[resource_id].remove(websocket)
-                if not self.subscriptions[resource_id]:
-                    del self.subscriptions[resource_id]
+        own = self._ws_channels.get(websocket)
+        if not own or resource_id not in own:
+            return
+        
+        # Keep channels one of this client's other subscriptions still covers
+        released = set(own.pop(resource_id))
+        released.difference_update(*own.values())
+        self._remove_from_channels(websocket, released)
+        if not own:
+            del self._ws_channels[websocket]
+    
+    async def _send_to_all(self, connections: Iterable[WebSocket], message: Union[dict, str]):
+        """
+        Serialize once and write to every connection concurrently, so one
+        slow client doesn't hold up the rest; connections that fail are dropped
+        """
+        connections = list(connections)
+        if not connections:
+            return
+        
+        payload = encode_message(message)
+        results = await asyncio.gather(
+            *(connection.send_text(payload) for connection in connections),
+            return_exceptions=True,
+        )
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                print(f"Error sending to connection: {result}")
+                await self.disconnect(connection)
     
-    async def broadcast(self, message: dict):
+    async def broadcast(self, message: Union[dict, str]):
         """Broadcast message to all connected clients"""
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                print(f"Error broadcasting to connection: {e}")
+        await self._send_to_all(self.active_connections, message)
     
-    async def broadcast_to_resource(self, resource_id: str, message: dict):
+    async def broadcast_to_resource(self, resource_id: str, message: Union[dict, str]):
         """Broadcast to clients subscribed to a specific resource"""
-        if resource_id in self.subscriptions:
-            for connection in self.subscriptions[resource_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    print(f"Error sending to connection: {e}")
+        await self._send_to_all(self.subscriptions.get(resource_id, ()), message)
+    
+    async def broadcast_to_channels(self, channels: Iterable[str], message: Union[dict, str]):
+        """Broadcast once to every client subscribed to any of the channels"""
+        recipients = dict.fromkeys(
+            connection
+            for channel in channels
+            for connection in self.subscriptions.get(channel, ())
+        )
+        await self._send_to_all(recipients, message)
     
     async def handle_location_update(self, resource_id: int, data: dict):
         """Handle incoming location update"""
@@ -96,8 +156,9 @@ class ConnectionManager:
             "status": status,
             "timestamp": datetime.utcnow().isoformat()
         }
-        await self.broadcast_to_resource(str(resource_id), message)
-        await self.broadcast(message)
+        payload = encode_message(message)
+        await self.broadcast_to_resource(str(resource_id), payload)
+        await self.broadcast(payload)
         return message
 
 
@@ -111,13 +172,17 @@ async def handle_websocket(websocket: WebSocket):
     try:
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            if data in PING_FRAMES:
+                await websocket.send_text(PONG_FRAME)
+                continue
+            
+            message = orjson.loads(data)
             message_type = message.get("type")
             
             if message_type == "subscribe":
                 resource_id = message.get("resource_id")
                 await manager.subscribe(websocket, str(resource_id))
-                await websocket.send_json({
+                await send_message(websocket, {
                     "type": "subscription_confirmed",
                     "resource_id": resource_id
                 })
@@ -125,13 +190,13 @@ async def handle_websocket(websocket: WebSocket):
             elif message_type == "unsubscribe":
                 resource_id = message.get("resource_id")
                 await manager.unsubscribe(websocket, str(resource_id))
-                await websocket.send_json({
+                await send_message(websocket, {
                     "type": "unsubscription_confirmed",
                     "resource_id": resource_id
                 })
             
             elif message_type == "ping":
-                await websocket.send_json({"type": "pong"})
+                await websocket.send_text(PONG_FRAME)
     
     except WebSocketDisconnect:
         await manager.disconnect(websocket)
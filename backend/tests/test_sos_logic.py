@@ -3,12 +3,15 @@ Phase 5 Tests: Citizen SOS + Real-Time Alerts
 Tests for SOS reporting, clustering, crowd assistance, and alert broadcasting
 """
 
+import sqlite3
+
 import pytest
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app import services
 from app.models import SOSReport, CrowdAssistance, AlertBroadcast, SOSStatus, EmergencyType
-from app.database import Base, SessionLocal, engine
+from app.database import SQLITE_MATH_FALLBACKS, Base, SessionLocal, _apply_sqlite_pragmas, engine
+from app.routers.sos import MAX_SUBSCRIPTION_RADIUS_KM, MAX_SUBSCRIPTION_TILES, location_tiles, sos_manager
 
 
 @pytest.fixture
@@ -260,6 +263,44 @@ class TestSOSLocationSearch:
         assert any(r.id == sos1.id for r in ids)
         assert not any(r.id == sos2.id for r in ids)
 
+    def test_math_fallbacks_without_sqlite_math_functions(self):
+        """Connections to SQLite builds without math functions get Python ones"""
+
+        class NoMathCursor:
+            def __init__(self, cursor):
+                self._cursor = cursor
+
+            def execute(self, sql, *args):
+                if sql.startswith("SELECT") and sql.split("(")[0][7:] in SQLITE_MATH_FALLBACKS:
+                    raise sqlite3.OperationalError("no such function")
+                return self._cursor.execute(sql, *args)
+
+            def close(self):
+                self._cursor.close()
+
+        class NoMathConnection:
+            def __init__(self):
+                self.raw = sqlite3.connect(":memory:")
+                self.registered = []
+
+            def cursor(self):
+                return NoMathCursor(self.raw.cursor())
+
+            def create_function(self, name, n_args, fn, deterministic=False):
+                self.registered.append(name)
+                self.raw.create_function(name, n_args, fn, deterministic=deterministic)
+
+        connection = NoMathConnection()
+        _apply_sqlite_pragmas(connection, None)
+
+        assert sorted(connection.registered) == sorted(SQLITE_MATH_FALLBACKS)
+        (value, missing, out_of_domain), = connection.raw.execute(
+            "SELECT power(sin(radians(90)), 2) + sqrt(cos(0)), sin(NULL), asin(2)"
+        ).fetchall()
+        assert value == pytest.approx(2.0)
+        assert missing is None
+        assert out_of_domain is None
+
 
 class TestSOSClustering:
     """Tests for clustering nearby SOS reports"""
@@ -315,6 +356,56 @@ class TestSOSClustering:
         assert cluster["severity_average"] == pytest.approx(5.0, 0.1)
         assert "medical" in cluster["incident_types"] or "fire" in cluster["incident_types"]
 
+    def test_cluster_chains_transitively(self, db: Session):
+        """A-B and B-C within the radius join A and C even when they are farther apart"""
+        # ~1.5 km steps along a meridian: A-C is ~3 km, beyond the 2 km radius
+        for i in range(3):
+            services.sos.create_sos_report(
+                db=db,
+                reporter_name=f"User {i}",
+                reporter_phone=f"+9198765432{i}",
+                latitude=28.7041 + i * 0.0135,
+                longitude=77.1025,
+                emergency_type="medical",
+                description=f"Emergency {i}",
+                severity_score=5.0,
+            )
+
+        clusters = services.sos.cluster_sos_reports(db, cluster_radius_km=2.0)
+
+        assert len(clusters) == 1
+        assert clusters[0]["num_incidents"] == 3
+
+    def test_cluster_across_antimeridian(self, db: Session):
+        """Reports either side of the 180th meridian cluster together"""
+        for i, longitude in enumerate((179.995, -179.995)):
+            services.sos.create_sos_report(
+                db=db,
+                reporter_name=f"User {i}",
+                reporter_phone=f"+9198765432{i}",
+                latitude=-16.5,
+                longitude=longitude,
+                emergency_type="medical",
+                description=f"Emergency {i}",
+                severity_score=5.0,
+            )
+
+        clusters = services.sos.cluster_sos_reports(db, cluster_radius_km=2.0)
+
+        assert len(clusters) == 1
+        assert clusters[0]["num_incidents"] == 2
+
+    def test_zero_radius_keeps_reports_apart(self, db: Session):
+        """A zero radius never links reports, instead of dividing by zero"""
+        reports = [
+            SOSReport(latitude=28.7041, longitude=77.1025),
+            SOSReport(latitude=28.7041, longitude=77.1025),
+        ]
+
+        groups = services.sos._group_reports_by_grid(reports, cluster_radius_km=0)
+
+        assert groups == [[reports[0]], [reports[1]]]
+
 
 class TestCrowdAssistance:
     """Tests for crowd assistance offerings"""
@@ -499,6 +590,71 @@ class TestAlertBroadcasting:
         assert national.recipients_reached > immediate.recipients_reached
 
 
+class TestSOSLocationSubscriptions:
+    """Tests for bounding WebSocket location subscriptions"""
+
+    def test_radius_is_clamped(self):
+        """A huge radius subscribes to at most the maximum radius' tiles"""
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        with TestClient(app).websocket_connect("/sos/ws") as websocket:
+            websocket.send_json({
+                "type": "subscribe_location",
+                "latitude": 28.7041,
+                "longitude": 77.1025,
+                "radius_km": 20000,
+            })
+            reply = websocket.receive_json()
+            subscribed_tiles = len(sos_manager.subscriptions)
+
+        assert reply["type"] == "subscription_confirmed"
+        assert reply["radius_km"] == MAX_SUBSCRIPTION_RADIUS_KM
+        assert subscribed_tiles == len(location_tiles(28.7041, 77.1025, MAX_SUBSCRIPTION_RADIUS_KM))
+        assert not sos_manager.subscriptions
+
+    def test_equal_radii_share_a_channel(self):
+        """Radii differing only in spelling or float noise name the same subscription"""
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        channels = []
+        with TestClient(app).websocket_connect("/sos/ws") as websocket:
+            for radius_km in (5, 5.0, 5.000000001):
+                websocket.send_json({
+                    "type": "subscribe_location",
+                    "latitude": 28.7041,
+                    "longitude": 77.1025,
+                    "radius_km": radius_km,
+                })
+                channels.append(websocket.receive_json()["channel"])
+            subscriptions = len(sos_manager._ws_channels[next(iter(sos_manager._ws_channels))])
+
+        assert channels == ["location:tile:574:1542:50"] * 3
+        assert subscriptions == 1
+
+    def test_too_many_tiles_rejected(self):
+        """Near the pole even the maximum radius spans too many tiles"""
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        with pytest.raises(ValueError):
+            location_tiles(89.9, 0.0, MAX_SUBSCRIPTION_RADIUS_KM)
+        assert len(location_tiles(28.7041, 77.1025, MAX_SUBSCRIPTION_RADIUS_KM)) <= MAX_SUBSCRIPTION_TILES
+
+        with TestClient(app).websocket_connect("/sos/ws") as websocket:
+            websocket.send_json({
+                "type": "subscribe_location",
+                "latitude": 89.9,
+                "longitude": 0.0,
+                "radius_km": MAX_SUBSCRIPTION_RADIUS_KM,
+            })
+            reply = websocket.receive_json()
+
+        assert reply["type"] == "subscription_error"
+        assert not sos_manager.subscriptions
+
+
 class TestSOSAnalytics:
     """Tests for SOS analytics"""
 
@@ -0,0 +1,61 @@
+"""
+WebSocket ConnectionManager Tests
+Tests for subscription bookkeeping and channel fan-out
+"""
+
+import asyncio
+
+from app.websockets.manager import ConnectionManager
+
+
+class FakeWebSocket:
+    """Records the text frames sent to it"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.sent.append(data)
+
+
+class TestConnectionManager:
+    """Tests for the manager-owned subscription reverse index"""
+
+    def test_disconnect_removes_every_subscription(self):
+        """Disconnecting drops the socket from every channel it was on"""
+        manager = ConnectionManager()
+        websocket, other = FakeWebSocket(), FakeWebSocket()
+
+        async def scenario():
+            await manager.connect(websocket)
+            await manager.connect(other)
+            await manager.subscribe(websocket, "area", channels=["tile:1", "tile:2"])
+            await manager.subscribe(websocket, "7")
+            await manager.subscribe(other, "area", channels=["tile:2"])
+            await manager.disconnect(websocket)
+
+        asyncio.run(scenario())
+
+        assert websocket not in manager.active_connections
+        assert websocket not in manager._ws_channels
+        assert all(websocket not in subscribers for subscribers in manager.subscriptions.values())
+        # Channels left without subscribers are dropped; shared ones keep the other client
+        assert manager.subscriptions == {"tile:2": {other: None}}
+
+    def test_overlapping_channels_broadcast_once(self):
+        """A socket subscribed to several of the broadcast's channels gets one frame"""
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+
+        async def scenario():
+            await manager.connect(websocket)
+            await manager.subscribe(websocket, "area-a", channels=["tile:1", "tile:2"])
+            await manager.subscribe(websocket, "area-b", channels=["tile:2", "tile:3"])
+            await manager.broadcast_to_channels(["tile:1", "tile:2", "tile:3"], {"type": "sos_alert"})
+
+        asyncio.run(scenario())
+
+        assert websocket.sent == ['{"type":"sos_alert"}']
@@ -1,7 +1,23 @@
 import pytest
 from datetime import datetime
-from app.services.dispatch import haversine_distance, estimate_arrival_time
-from app.models import ResourceType
+from app.services.dispatch import haversine_distance, estimate_arrival_time, update_resource_locations
+from app.models import Resource, ResourceType
+from app.schemas import LocationUpdateRequest
+from app.database import Base, SessionLocal, engine
+
+
+@pytest.fixture
+def db():
+    """Get test database session"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.query(Resource).delete()
+        db.commit()
+        db.close()
 
 
 class TestDistanceCalculation:
@@ -79,3 +95,63 @@ class TestArrivalTimeEstimation:
         # 100 km at 60 km/h should take ~100 minutes
         total_minutes = arrival.total_seconds() / 60
         assert 95 < total_minutes < 105
+
+
+class TestBatchLocationUpdates:
+    """Test batched resource location updates"""
+    
+    def _add_resource(self, db, name):
+        resource = Resource(name=name, type=ResourceType.AMBULANCE, latitude=28.7041, longitude=77.1025)
+        db.add(resource)
+        db.commit()
+        return resource.id
+    
+    def test_last_update_per_resource_wins(self, db):
+        """A resource reported twice in one batch keeps its last position"""
+        resource_id = self._add_resource(db, "Ambulance 1")
+        
+        updated, not_found = update_resource_locations(db, [
+            LocationUpdateRequest(resource_id=resource_id, latitude=28.70, longitude=77.10, speed=10.0),
+            LocationUpdateRequest(resource_id=resource_id, latitude=28.71, longitude=77.11, speed=20.0),
+        ])
+        
+        assert updated == [resource_id]
+        assert not_found == []
+        db.expire_all()
+        resource = db.get(Resource, resource_id)
+        assert (resource.latitude, resource.longitude, resource.speed) == (28.71, 77.11, 20.0)
+    
+    def test_unknown_ids_returned(self, db):
+        """Ids with no matching resource are reported and the rest still apply"""
+        resource_id = self._add_resource(db, "Ambulance 1")
+        unknown_id = resource_id + 1000
+        
+        updated, not_found = update_resource_locations(db, [
+            LocationUpdateRequest(resource_id=unknown_id, latitude=28.70, longitude=77.10),
+            LocationUpdateRequest(resource_id=resource_id, latitude=28.72, longitude=77.12),
+        ])
+        
+        assert updated == [resource_id]
+        assert not_found == [unknown_id]
+    
+    def test_batch_endpoint(self, db):
+        """The batch route reports updated and unknown resource ids"""
+        from fastapi.testclient import TestClient
+        from app.main import app
+        
+        resource_id = self._add_resource(db, "Ambulance 1")
+        
+        response = TestClient(app).post("/resources/locations/batch", json=[
+            {"resource_id": resource_id, "latitude": 28.70, "longitude": 77.10},
+            {"resource_id": resource_id, "latitude": 28.73, "longitude": 77.13},
+            {"resource_id": resource_id + 1000, "latitude": 28.70, "longitude": 77.10},
+        ])
+        
+        assert response.status_code == 200
+        assert response.json() == {
+            "status": "success",
+            "updated": [resource_id],
+            "not_found": [resource_id + 1000],
+        }
+        db.expire_all()
+        assert db.get(Resource, resource_id).latitude == 28.73